@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MediaApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "media_api"
+
+    def ready(self):
+        from media_api import signals  # noqa: F401
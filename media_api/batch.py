@@ -0,0 +1,177 @@
+"""Batched post, comment and like mutations.
+
+``apply`` writes a whole validated batch in one transaction with one
+``bulk_create`` per model. Bulk writes send no signals, so counters,
+trending buckets, hashtags, cached responses and timeline fan-out are
+updated here explicitly, once per affected row instead of once per
+operation.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers, status
+
+from media_api import counters, hashtags, like_buffer, trending
+from media_api.models import Comment, Like, Post
+from media_api.tasks import fan_out_post
+from social_media_api import response_cache
+
+CREATE_POST = "create_post"
+CREATE_COMMENT = "create_comment"
+LIKE = "like"
+UNLIKE = "unlike"
+
+OPERATIONS = (CREATE_POST, CREATE_COMMENT, LIKE, UNLIKE)
+
+
+def missing_posts(operations, lock=False):
+    """Map operation index to the id of a referenced post that is missing.
+
+    With ``lock`` the existing posts stay locked against deletion until
+    the surrounding transaction ends.
+    """
+    referenced = {op["post"] for op in operations if "post" in op}
+    posts = Post.objects.filter(id__in=referenced).order_by("id")
+    if lock:
+        posts = posts.select_for_update()
+    existing = set(posts.values_list("id", flat=True))
+    return {
+        index: op["post"]
+        for index, op in enumerate(operations)
+        if "post" in op and op["post"] not in existing
+    }
+
+
+def missing_posts_errors(missing):
+    return {
+        index: {"post": f"Invalid pk \"{post_id}\""}
+        for index, post_id in missing.items()
+    }
+
+
+def _apply_likes(user, operations, results):
+    """Replay like/unlike in order against the likes the user already has"""
+    like_ops = [
+        (index, op) for index, op in enumerate(operations)
+        if op["op"] in (LIKE, UNLIKE)
+    ]
+    if not like_ops:
+        return set(), set()
+
+    if settings.LIKE_WRITE_BEHIND:
+        buffer = like_buffer.get_buffer()
+        for index, op in like_ops:
+            buffer.push(op["post"], user.id, liked=op["op"] == LIKE)
+            results[index] = {"status": status.HTTP_202_ACCEPTED}
+        return set(), set()
+
+    before = set(
+        Like.objects.filter(
+            user=user, post_id__in={op["post"] for _, op in like_ops}
+        ).values_list("post_id", flat=True)
+    )
+    liked = set(before)
+    for index, op in like_ops:
+        if op["op"] == UNLIKE:
+            liked.discard(op["post"])
+            results[index] = {"status": status.HTTP_204_NO_CONTENT}
+        elif op["post"] in liked:
+            results[index] = {"status": status.HTTP_200_OK}
+        else:
+            liked.add(op["post"])
+            results[index] = {"status": status.HTTP_201_CREATED}
+
+    added, removed = liked - before, before - liked
+    Like.objects.bulk_create(
+        [Like(post_id=post_id, user=user) for post_id in added],
+        ignore_conflicts=True,
+    )
+    if removed:
+        Like.objects.filter(user=user, post_id__in=removed).delete()
+    return added, removed
+
+
+def apply(user, operations):
+    """Apply validated ``operations`` of ``user``; return per-op results.
+
+    Results of create operations carry the new row as ``instance``. Posts
+    deleted since validation fail the batch like they would have there.
+    """
+    results = [None] * len(operations)
+
+    with transaction.atomic():
+        missing = missing_posts(operations, lock=True)
+        if missing:
+            raise serializers.ValidationError(
+                {"operations": missing_posts_errors(missing)}
+            )
+
+        post_ops = [
+            index for index, op in enumerate(operations)
+            if op["op"] == CREATE_POST
+        ]
+        posts = Post.objects.bulk_create(
+            [
+                Post(author=user, content=operations[index]["content"])
+                for index in post_ops
+            ]
+        )
+
+        comment_ops = [
+            index for index, op in enumerate(operations)
+            if op["op"] == CREATE_COMMENT
+        ]
+        comments = Comment.objects.bulk_create(
+            [
+                Comment(
+                    author=user,
+                    post_id=operations[index]["post"],
+                    content=operations[index]["content"],
+                )
+                for index in comment_ops
+            ]
+        )
+
+        added, removed = _apply_likes(user, operations, results)
+
+        commented = Counter(comment.post_id for comment in comments)
+        touched = set(commented) | added | removed
+        counters.reconcile(touched)
+        for post_id in touched:
+            if post_id in added or commented[post_id]:
+                trending.record(
+                    post_id,
+                    likes=int(post_id in added),
+                    comments=commented[post_id],
+                )
+        if posts:
+            hashtags.sync_hashtags(posts)
+
+        for post_id in touched:
+            response_cache.bump("post", post_id)
+        if posts:
+            response_cache.bump("author", user.id)
+        if added or removed:
+            response_cache.bump("likes", user.id)
+
+        def fan_out():
+            for post in posts:
+                fan_out_post.delay(post.id)
+
+        transaction.on_commit(fan_out)
+
+    prefetch_related_objects(posts, "image_variants")
+    for index, post in zip(post_ops, posts):
+        results[index] = {
+            "status": status.HTTP_201_CREATED,
+            "instance": post,
+        }
+    for index, comment in zip(comment_ops, comments):
+        results[index] = {
+            "status": status.HTTP_201_CREATED,
+            "instance": comment,
+        }
+    return results
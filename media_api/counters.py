@@ -0,0 +1,50 @@
+"""Denormalized ``Post.like_count`` / ``Post.comment_count`` maintenance.
+
+Single rows are counted incrementally with ``F()`` updates from signals;
+anything written in bulk (or counters that drifted) is recounted here.
+"""
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from media_api.models import Comment, Like, Post
+
+
+def increment(post_id, field, delta=1):
+    """Atomically add ``delta`` to a counter of a post"""
+    posts = Post.objects.filter(id=post_id)
+    if delta < 0:
+        posts = posts.filter(**{f"{field}__gte": -delta})
+    posts.update(**{field: F(field) + delta})
+
+
+def _actual_count(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def reconcile(post_ids):
+    """Recount likes and comments of ``post_ids``; return drifted rows"""
+    return (
+        Post.objects.filter(id__in=post_ids)
+        .alias(
+            actual_likes=_actual_count(Like),
+            actual_comments=_actual_count(Comment),
+        )
+        .filter(
+            ~Q(like_count=F("actual_likes"))
+            | ~Q(comment_count=F("actual_comments"))
+        )
+        .update(
+            like_count=_actual_count(Like),
+            comment_count=_actual_count(Comment),
+        )
+    )
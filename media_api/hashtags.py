@@ -0,0 +1,83 @@
+"""Hashtag parsing and the ``PostHashtag`` inverted index."""
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from media_api.models import Hashtag, PostHashtag
+
+HASHTAG_RE = re.compile(r"(?<![\w#])#(\w+)")
+MAX_HASHTAG_LENGTH = Hashtag._meta.get_field("name").max_length
+
+
+def normalize(tag):
+    return tag.lstrip("#").casefold()
+
+
+def extract_hashtags(text):
+    """Return the set of normalized hashtags mentioned in ``text``"""
+    return {
+        normalize(tag)
+        for tag in HASHTAG_RE.findall(text)
+        if len(tag) <= MAX_HASHTAG_LENGTH
+    }
+
+
+def sync_hashtags(posts):
+    """Bring the hashtag links of ``posts`` in line with their content"""
+    wanted = {post.id: extract_hashtags(post.content) for post in posts}
+    created_at = {post.id: post.created_at for post in posts}
+    names = set().union(*wanted.values())
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names], ignore_conflicts=True
+    )
+    hashtag_ids = dict(
+        Hashtag.objects.filter(name__in=names).values_list("name", "id")
+    )
+    desired = {
+        (post_id, hashtag_ids[name])
+        for post_id, post_names in wanted.items()
+        for name in post_names
+    }
+    existing = set(
+        PostHashtag.objects.filter(post_id__in=wanted).values_list(
+            "post_id", "hashtag_id"
+        )
+    )
+
+    stale = existing - desired
+    if stale:
+        PostHashtag.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(post_id=post_id, hashtag_id=hashtag_id)
+                    for post_id, hashtag_id in stale
+                ),
+            )
+        ).delete()
+    PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(
+                post_id=post_id,
+                hashtag_id=hashtag_id,
+                created_at=created_at[post_id],
+            )
+            for post_id, hashtag_id in desired - existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def tagged_post_links(tag):
+    """``PostHashtag`` rows of ``tag``, newest first, with their posts"""
+    return (
+        PostHashtag.objects.filter(hashtag__name=normalize(tag))
+        .select_related("post__author")
+        .prefetch_related("post__image_variants")
+        .defer("post__search_vector")
+        .order_by("-created_at", "-post_id")
+    )
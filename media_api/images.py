@@ -0,0 +1,78 @@
+"""Derivatives of ``Post.image``.
+
+Every configured ``POST_IMAGE_VARIANTS`` size is rendered in each
+``PostImageVariant.Format`` with EXIF orientation applied and all metadata
+dropped, so feeds never have to download the full-size original.
+"""
+
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from media_api.models import Post, PostImageVariant
+from social_media_api.uploads import load_verified
+
+logger = logging.getLogger(__name__)
+
+QUALITY = 80
+
+
+def render(image, max_edge, image_format):
+    variant = image.copy()
+    variant.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    if image_format == PostImageVariant.Format.JPEG or variant.mode not in (
+        "RGB",
+        "RGBA",
+    ):
+        variant = variant.convert("RGB")
+    buffer = BytesIO()
+    # Nothing from ``info`` is passed on, so EXIF/ICC/XMP are not written
+    variant.save(buffer, format=image_format.upper(), quality=QUALITY)
+    return variant.size, buffer.getvalue()
+
+
+def delete_variants(post):
+    for variant in post.image_variants.all():
+        variant.image.delete(save=False)
+        variant.delete()
+
+
+def generate_variants(post):
+    """(Re)build all variants of ``post.image``; return how many.
+
+    Uploads are only header-checked in the request, so an image that fails
+    full verification here is removed from the post.
+    """
+    delete_variants(post)
+    if not post.image:
+        return 0
+
+    image = load_verified(post.image)
+    if image is None:
+        logger.warning("Removing invalid image of post %s", post.id)
+        post.image.delete(save=False)
+        Post.objects.filter(id=post.id).update(image=None)
+        return 0
+
+    created = 0
+    for size, max_edge in settings.POST_IMAGE_VARIANTS.items():
+        for image_format in PostImageVariant.Format.values:
+            (width, height), content = render(image, max_edge, image_format)
+            variant = PostImageVariant(
+                post=post,
+                size=size,
+                format=image_format,
+                width=width,
+                height=height,
+            )
+            variant.image.save(
+                f"{post.id}-{size}.{image_format}",
+                ContentFile(content),
+                save=False,
+            )
+            variant.save()
+            created += 1
+    return created
@@ -0,0 +1,83 @@
+"""Write-behind buffer for like/unlike intents.
+
+With ``LIKE_WRITE_BEHIND`` enabled the like and unlike actions only record
+the latest intent per ``(post, user)`` here; ``flush_like_buffer`` applies
+them to the database in bulk. The Redis buffer is shared by every web and
+Celery process. Without ``REDIS_URL`` an in-process buffer is used, which
+only suits development and tests where the flush runs in the same process.
+
+``drain`` moves pending intents aside and returns them, and ``ack``
+forgets them once the flush has committed. Intents of a failed flush
+stay aside and are drained again by the next flush.
+"""
+
+import threading
+
+import redis
+from django.conf import settings
+
+
+class InMemoryLikeBuffer:
+    def __init__(self):
+        self._intents = {}
+        self._draining = {}
+        self._lock = threading.Lock()
+
+    def push(self, post_id, user_id, liked):
+        with self._lock:
+            self._intents[(post_id, user_id)] = liked
+
+    def drain(self):
+        """Return all pending ``{(post_id, user_id): liked}``"""
+        with self._lock:
+            # Newer intents override those left by a failed flush
+            self._draining.update(self._intents)
+            self._intents = {}
+            return dict(self._draining)
+
+    def ack(self):
+        """Forget the intents returned by ``drain``"""
+        with self._lock:
+            self._draining = {}
+
+
+class RedisLikeBuffer:
+    key = "media_api:like_buffer"
+    draining_key = "media_api:like_buffer:draining"
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    def push(self, post_id, user_id, liked):
+        self._redis.hset(self.key, f"{post_id}:{user_id}", int(liked))
+
+    def drain(self):
+        """Return all pending ``{(post_id, user_id): liked}``"""
+        # Renaming is atomic, so pushes racing the drain land in a new hash.
+        # A hash left by a failed flush is drained first, on its own, so
+        # its intents are applied before the newer ones.
+        try:
+            self._redis.renamenx(self.key, self.draining_key)
+        except redis.ResponseError:
+            pass
+        raw = self._redis.hgetall(self.draining_key)
+
+        intents = {}
+        for member, liked in raw.items():
+            post_id, user_id = member.decode().split(":")
+            intents[(int(post_id), int(user_id))] = liked == b"1"
+        return intents
+
+    def ack(self):
+        """Forget the intents returned by ``drain``"""
+        self._redis.delete(self.draining_key)
+
+
+_buffers = {}
+
+
+def get_buffer():
+    url = settings.REDIS_URL
+    if url not in _buffers:
+        _buffers[url] = RedisLikeBuffer(url) if url else InMemoryLikeBuffer()
+    return _buffers[url]
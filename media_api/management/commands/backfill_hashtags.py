@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from media_api.hashtags import sync_hashtags
+from media_api.models import Post
+
+
+class Command(BaseCommand):
+    help = "Re-parse hashtags of existing posts in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = 0
+        parsed = 0
+        while True:
+            posts = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "content", "created_at")[:chunk_size]
+            )
+            if not posts:
+                break
+            sync_hashtags(posts)
+            parsed += len(posts)
+            last_id = posts[-1].id
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Parsed hashtags of {parsed} posts")
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from social_media_api import db_pool
+
+
+class Command(BaseCommand):
+    help = "Show checkout, wait and saturation totals of connection pools"
+
+    def handle(self, *args, **options):
+        for alias, stats in db_pool.stats().items():
+            requests = stats["requests_num"]
+            queued = stats["requests_queued"]
+            # Checkouts that found no idle connection had to wait
+            saturation = queued / requests if requests else 0
+            average_wait = stats["requests_wait_ms"] / queued if queued else 0
+            self.stdout.write(
+                f"{alias}: requests={requests} queued={queued} "
+                f"saturation={saturation:.2%} "
+                f"avg_wait_ms={average_wait:.1f} "
+                f"timeouts={stats['requests_errors']} "
+                f"connections={stats['connections_num']} "
+                f"lost={stats['connections_lost']} "
+                f"bad_returns={stats['returns_bad']}"
+            )
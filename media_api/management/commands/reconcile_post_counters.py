@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from media_api import counters
+from media_api.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recount like_count and comment_count of posts in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        fixed = 0
+        while True:
+            post_ids = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not post_ids:
+                break
+            fixed += counters.reconcile(post_ids)
+            last_id = post_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled counters of {fixed} posts")
+        )
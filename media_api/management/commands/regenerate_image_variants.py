@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from media_api.images import generate_variants
+from media_api.models import Post
+
+
+def regenerate(post_id):
+    try:
+        post = Post.objects.only("id", "image").get(id=post_id)
+        return generate_variants(post)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Rebuild image variants of all posts with an image in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = (
+            Post.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .order_by("id")
+        )
+        last_id = 0
+        total = 0
+        # Pillow releases the GIL while resizing and encoding
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                post_ids = list(
+                    posts.filter(id__gt=last_id).values_list(
+                        "id", flat=True
+                    )[:batch_size]
+                )
+                if not post_ids:
+                    break
+                total += sum(pool.map(regenerate, post_ids))
+                last_id = post_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated {total} image variants")
+        )
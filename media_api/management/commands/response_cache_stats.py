@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from social_media_api import response_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counts of the versioned response cache"
+
+    def handle(self, *args, **options):
+        stats = response_cache.stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"hit_ratio={ratio:.2%}"
+        )
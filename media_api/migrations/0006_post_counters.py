@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-18 04:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    Post = apps.get_model("media_api", "Post")
+
+    def actual_count(model_name):
+        model = apps.get_model("media_api", model_name)
+        return Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+
+    Post.objects.update(
+        like_count=actual_count("Like"),
+        comment_count=actual_count("Comment"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0005_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-18 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    Like = apps.get_model("media_api", "Like")
+    Post = apps.get_model("media_api", "Post")
+
+    duplicates = (
+        Like.objects.values("post", "user")
+        .annotate(first_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    post_ids = set()
+    for duplicate in duplicates.iterator():
+        Like.objects.filter(
+            post_id=duplicate["post"], user_id=duplicate["user"]
+        ).exclude(id=duplicate["first_id"]).delete()
+        post_ids.add(duplicate["post"])
+
+    Post.objects.filter(id__in=post_ids).update(
+        like_count=Coalesce(
+            Subquery(
+                Like.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0006_post_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(
+                fields=("post", "user"), name="unique_post_like"
+            ),
+        ),
+    ]
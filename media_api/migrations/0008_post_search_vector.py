@@ -0,0 +1,73 @@
+# Generated by Django 5.1 on 2026-10-18 04:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+CREATE_SEARCH_VECTOR = """
+CREATE INDEX post_search_vector_idx
+    ON media_api_post USING gin (search_vector);
+
+CREATE FUNCTION media_api_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('english', coalesce(NEW.content, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER media_api_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content ON media_api_post
+    FOR EACH ROW EXECUTE FUNCTION media_api_post_search_vector_update();
+
+UPDATE media_api_post
+    SET search_vector = to_tsvector('english', coalesce(content, ''));
+"""
+
+DROP_SEARCH_VECTOR = """
+DROP TRIGGER IF EXISTS media_api_post_search_vector_trigger ON media_api_post;
+DROP FUNCTION IF EXISTS media_api_post_search_vector_update();
+DROP INDEX IF EXISTS post_search_vector_idx;
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SEARCH_VECTOR)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0007_unique_post_like"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # The GIN index and its trigger only exist on PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="post",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="post_search_vector_idx"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_vector, drop_search_vector),
+            ],
+        ),
+    ]
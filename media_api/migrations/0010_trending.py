@@ -0,0 +1,97 @@
+# Generated by Django 5.1 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0009_hashtags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingHashtag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "hashtag",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending",
+                        to="media_api.hashtag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TrendingPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending",
+                        to="media_api.post",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EngagementBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("minute", models.DateTimeField()),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("comments", models.PositiveIntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="engagement_buckets",
+                        to="media_api.post",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["minute"], name="engagement_minute_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "minute"), name="unique_engagement_bucket"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-18 04:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0010_trending"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostImageVariant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("size", models.CharField(max_length=20)),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("webp", "Webp"), ("jpeg", "Jpeg")], max_length=10
+                    ),
+                ),
+                ("image", models.ImageField(upload_to="posts/variants/")),
+                ("width", models.PositiveIntegerField()),
+                ("height", models.PositiveIntegerField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="image_variants",
+                        to="media_api.post",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "size", "format"),
+                        name="unique_post_image_variant",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media_api", "0013_scheduledpost"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("open", "Open"),
+                    ("finalizing", "Finalizing"),
+                    ("complete", "Complete"),
+                ],
+                default="open",
+                max_length=10,
+            ),
+        ),
+    ]
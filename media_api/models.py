@@ -1,3 +1,7 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from user.models import User
@@ -13,6 +17,15 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Maintained by a database trigger on PostgreSQL (see migration 0008)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+        ]
 
     def __str__(self):
         return f"{self.author.email} - {self.content[:30]}"
@@ -50,5 +63,245 @@ class Like(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "user"], name="unique_post_like"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.email} liked {self.post.id}"
+
+
+class TimelineEntry(models.Model):
+    """Precomputed home timeline row: ``post`` fanned out to ``user``."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries"
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-post"],
+                name="timeline_user_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in timeline of {self.user_id}"
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="post_hashtags"
+    )
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="post_hashtags"
+    )
+    # Copy of post.created_at so tag pages are read in index order
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "hashtag"], name="unique_post_hashtag"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["hashtag", "-created_at", "-post"],
+                name="hashtag_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.hashtag} on {self.post_id}"
+
+
+class EngagementBucket(models.Model):
+    """Likes and comments a post received within one minute"""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="engagement_buckets"
+    )
+    minute = models.DateTimeField()
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "minute"], name="unique_engagement_bucket"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["minute"], name="engagement_minute_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} at {self.minute:%Y-%m-%d %H:%M}"
+
+
+class TrendingPost(models.Model):
+    """Precomputed top posts by time-decayed engagement"""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="trending"
+    )
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.post_id} ({self.score:.2f})"
+
+
+class TrendingHashtag(models.Model):
+    """Precomputed top hashtags by time-decayed engagement"""
+
+    hashtag = models.OneToOneField(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="trending"
+    )
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.hashtag} ({self.score:.2f})"
+
+
+class PostImageVariant(models.Model):
+    """Resized, EXIF-free copy of ``Post.image``"""
+
+    class Format(models.TextChoices):
+        WEBP = "webp"
+        JPEG = "jpeg"
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="image_variants"
+    )
+    size = models.CharField(max_length=20)
+    format = models.CharField(max_length=10, choices=Format.choices)
+    image = models.ImageField(upload_to="posts/variants/")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "size", "format"],
+                name="unique_post_image_variant",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} {self.size} {self.format}"
+
+
+class UploadSession(models.Model):
+    """Resumable upload whose chunks are kept on disk until finalized"""
+
+    class Status(models.TextChoices):
+        OPEN = "open"
+        FINALIZING = "finalizing"
+        COMPLETE = "complete"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.OPEN
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="upload_sessions"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class ScheduledPost(models.Model):
+    """Post waiting in the database until ``publish_at``"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PUBLISHED = "published"
+        CANCELLED = "cancelled"
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="scheduled_posts"
+    )
+    content = models.TextField()
+    publish_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="schedule"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["publish_at", "status"],
+                name="scheduled_post_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} at {self.publish_at} ({self.status})"
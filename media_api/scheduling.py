@@ -0,0 +1,59 @@
+"""Publishing of scheduled posts.
+
+Scheduled posts wait in the ``ScheduledPost`` table instead of as ETA tasks
+in worker memory. ``publish_due`` runs from Celery beat: it claims due rows
+with ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent publishers never
+pick the same row, and creates their posts with one ``bulk_create``.
+``bulk_create`` sends no signals, so hashtags and caches are handled here
+and the caller fans the returned posts out.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from media_api import hashtags
+from media_api.models import Post, ScheduledPost
+from social_media_api import response_cache
+
+
+def publish_batch(now, batch_size):
+    """Publish up to ``batch_size`` due posts; return their post ids"""
+    with transaction.atomic():
+        due = list(
+            ScheduledPost.objects.select_for_update(skip_locked=True)
+            .filter(
+                publish_at__lte=now, status=ScheduledPost.Status.PENDING
+            )
+            .order_by("publish_at", "id")[:batch_size]
+        )
+        if not due:
+            return []
+
+        posts = Post.objects.bulk_create(
+            [
+                Post(author_id=scheduled.author_id, content=scheduled.content)
+                for scheduled in due
+            ]
+        )
+        for scheduled, post in zip(due, posts):
+            scheduled.status = ScheduledPost.Status.PUBLISHED
+            scheduled.post = post
+        ScheduledPost.objects.bulk_update(due, ["status", "post"])
+
+        hashtags.sync_hashtags(posts)
+        for author_id in {post.author_id for post in posts}:
+            response_cache.bump("author", author_id)
+    return [post.id for post in posts]
+
+
+def publish_due(now=None):
+    """Publish every scheduled post that is due; return the new post ids"""
+    now = now or timezone.now()
+    batch_size = settings.SCHEDULED_POST_BATCH_SIZE
+    published = []
+    while True:
+        post_ids = publish_batch(now, batch_size)
+        published.extend(post_ids)
+        if len(post_ids) < batch_size:
+            return published
@@ -0,0 +1,48 @@
+"""Ranked full-text search over ``Post.content``.
+
+On PostgreSQL posts are matched against the trigger-maintained
+``search_vector`` column through its GIN index and ordered by
+``SearchRank``. Plain text is parsed as a web search (``"quoted phrases"``
+and ``-excluded`` words work), and a trailing ``*`` on a word turns it into
+a prefix match. Other databases fall back to ``icontains``.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+
+SEARCH_CONFIG = "english"
+
+WORD_RE = re.compile(r"(\w+)(\*?)")
+
+
+def build_query(text):
+    if "*" not in text:
+        return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    terms = [
+        f"{word}:*" if prefix else word
+        for word, prefix in WORD_RE.findall(text)
+    ]
+    return SearchQuery(
+        " & ".join(terms), search_type="raw", config=SEARCH_CONFIG
+    )
+
+
+def search_posts(queryset, text):
+    """Filter ``queryset`` by ``text``, best matches first"""
+    text = text.strip()
+    if not text:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(content__icontains=text)
+    if "*" in text and not WORD_RE.search(text):
+        return queryset.none()
+
+    query = build_query(text)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")
+    )
@@ -1,9 +1,26 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
 
-from media_api.models import Post, Comment, Like
+from media_api import batch, upload_sessions
+from media_api.models import (
+    Post,
+    Comment,
+    Like,
+    ScheduledPost,
+    TrendingHashtag,
+    UploadSession,
+)
+from social_media_api.fieldsets import SparseFieldsMixin
+from social_media_api.uploads import HeaderValidatedImageField
+from user.serializers import UserSummarySerializer
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image = HeaderValidatedImageField(required=False, allow_null=True)
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Post
         fields = (
@@ -13,11 +30,42 @@ class PostSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "image",
+            "image_variants",
+            "like_count",
+            "comment_count",
         )
-        read_only_fields = ("id", "author", "created_at", "updated_at")
+        read_only_fields = (
+            "id",
+            "author",
+            "created_at",
+            "updated_at",
+            "like_count",
+            "comment_count",
+        )
+        expandable_fields = {"author": UserSummarySerializer}
+        field_prefetches = {"image_variants": ["image_variants"]}
+
+    def get_image_variants(self, post):
+        """``{format: srcset}`` of the resized copies of the image"""
+        request = self.context.get("request")
+        variants = sorted(
+            post.image_variants.all(), key=lambda variant: variant.width
+        )
+        srcset = {}
+        for variant in variants:
+            url = variant.image.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            srcset.setdefault(variant.format, []).append(
+                f"{url} {variant.width}w"
+            )
+        return {
+            image_format: ", ".join(candidates)
+            for image_format, candidates in srcset.items()
+        }
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = (
@@ -29,9 +77,178 @@ class CommentSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("id", "author", "created_at", "updated_at")
+        expandable_fields = {
+            "author": UserSummarySerializer,
+            "post": PostSerializer,
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Comments stay on their post, whose comment_count includes them
+        if self.instance is not None and "post" in fields:
+            fields["post"].read_only = True
+        return fields
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ("id", "post", "user", "created_at")
+        expandable_fields = {
+            "post": PostSerializer,
+            "user": UserSummarySerializer,
+        }
+
+
+class TrendingHashtagSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source="hashtag.name")
+
+    class Meta:
+        model = TrendingHashtag
+        fields = ("name", "score")
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_count = serializers.IntegerField(read_only=True)
+    missing_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "filename",
+            "size",
+            "sha256",
+            "chunk_size",
+            "chunk_count",
+            "missing_chunks",
+            "status",
+            "post",
+            "created_at",
+        )
+        read_only_fields = ("id", "chunk_size", "status", "post", "created_at")
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_SESSION_MAX_SIZE:
+            raise serializers.ValidationError(
+                "Size must be between 1 and "
+                f"{settings.UPLOAD_SESSION_MAX_SIZE} bytes"
+            )
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (
+            len(value) != 64
+            or not set(value) <= set("0123456789abcdef")
+        ):
+            raise serializers.ValidationError(
+                "Expected a hex-encoded SHA-256 digest"
+            )
+        return value
+
+    def validate(self, attrs):
+        unfinished = UploadSession.objects.filter(
+            owner=self.context["request"].user
+        ).exclude(status=UploadSession.Status.COMPLETE)
+        if unfinished.count() >= settings.UPLOAD_SESSION_MAX_OPEN:
+            raise serializers.ValidationError(
+                "Finalize or delete one of your "
+                f"{settings.UPLOAD_SESSION_MAX_OPEN} open upload sessions "
+                "first"
+            )
+        return attrs
+
+    def get_missing_chunks(self, session):
+        if session.status != UploadSession.Status.OPEN:
+            return []
+        return upload_sessions.missing_chunks(session)
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    post = serializers.PrimaryKeyRelatedField(
+        queryset=Post.objects.defer("search_vector")
+    )
+
+    def validate_post(self, post):
+        if post.author_id != self.context["request"].user.id:
+            raise PermissionDenied("You are allowed to edit only yours posts")
+        return post
+
+
+class ScheduledPostSerializer(serializers.ModelSerializer):
+    scheduled_time = serializers.DateTimeField(source="publish_at")
+
+    class Meta:
+        model = ScheduledPost
+        fields = (
+            "id",
+            "content",
+            "scheduled_time",
+            "status",
+            "post",
+            "created_at",
+        )
+        read_only_fields = ("id", "status", "post", "created_at")
+
+    def validate_scheduled_time(self, value):
+        if value <= timezone.now():
+            raise serializers.ValidationError(
+                "Scheduled time must be in the future"
+            )
+        return value
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=batch.OPERATIONS)
+    post = serializers.IntegerField(required=False)
+    content = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        required = {
+            batch.CREATE_POST: ("content",),
+            batch.CREATE_COMMENT: ("post", "content"),
+            batch.LIKE: ("post",),
+            batch.UNLIKE: ("post",),
+        }[attrs["op"]]
+        missing = {
+            field: "This field is required."
+            for field in required
+            if field not in attrs
+        }
+        if missing:
+            raise serializers.ValidationError(missing)
+        return {field: attrs[field] for field in ("op", *required)}
+
+
+class OperationListField(serializers.ListField):
+    """List field that checks ``max_length`` before validating any item"""
+
+    def to_internal_value(self, data):
+        if (
+            self.max_length is not None
+            and isinstance(data, (list, tuple))
+            and len(data) > self.max_length
+        ):
+            self.fail("max_length", max_length=self.max_length)
+        return super().to_internal_value(data)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = OperationListField(
+        child=BatchOperationSerializer(), min_length=1
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Read per instance so that override_settings applies
+        fields["operations"].max_length = settings.BATCH_MAX_OPERATIONS
+        return fields
+
+    def validate_operations(self, operations):
+        missing = batch.missing_posts(operations)
+        if missing:
+            raise serializers.ValidationError(
+                batch.missing_posts_errors(missing)
+            )
+        return operations
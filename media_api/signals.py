@@ -0,0 +1,170 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from media_api import counters, trending
+from media_api.hashtags import sync_hashtags
+from media_api.models import Comment, Like, Post
+from media_api.tasks import (
+    backfill_timeline,
+    prune_cleared_timelines,
+    prune_timeline,
+    reconcile_fanout,
+)
+from social_media_api import response_cache
+from user import follows
+from user.models import User
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def sync_timeline_on_follow(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Backfill or prune home timelines when follow edges change"""
+    if action == "pre_clear":
+        instance._cleared_timeline_ids = follows.neighbour_ids(
+            instance, reverse
+        )
+        return
+    if action == "post_clear":
+        cleared = list(getattr(instance, "_cleared_timeline_ids", ()))
+        if not cleared:
+            return
+        transaction.on_commit(
+            partial(
+                prune_cleared_timelines.delay, instance.pk, cleared, reverse
+            )
+        )
+        followers, authors = (
+            ([instance.pk], cleared) if reverse else (cleared, [instance.pk])
+        )
+        for pk in followers:
+            response_cache.bump("feed", pk)
+        reconcile_crossed_authors(authors, 1 if reverse else len(cleared))
+        return
+    if action == "post_add":
+        task = backfill_timeline
+    elif action == "post_remove":
+        task = prune_timeline
+    else:
+        return
+
+    # ``user.following`` is the reverse side: instance is the follower
+    for pk in pk_set or ():
+        follower_id, author_id = (
+            (instance.pk, pk) if reverse else (pk, instance.pk)
+        )
+        transaction.on_commit(partial(task.delay, follower_id, author_id))
+        response_cache.bump("feed", follower_id)
+    if pk_set:
+        reconcile_crossed_authors(
+            pk_set if reverse else [instance.pk],
+            1 if reverse else len(pk_set),
+        )
+
+
+def reconcile_crossed_authors(author_ids, delta):
+    """Reconcile authors whose follower count may have crossed the limit.
+
+    Counts may be read before or after this change updated them, so any
+    author within ``delta`` of the limit on either side is reconciled.
+    """
+    limit = settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+    crossed = User.objects.filter(
+        id__in=author_ids,
+        followers_count__gte=limit - delta,
+        followers_count__lte=limit + delta,
+    ).values_list("id", flat=True)
+    for author_id in crossed:
+        transaction.on_commit(partial(reconcile_fanout.delay, author_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    response_cache.bump("post", instance.pk)
+    response_cache.bump("author", instance.author_id)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_like(sender, instance, **kwargs):
+    response_cache.bump("post", instance.post_id)
+    response_cache.bump("likes", instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    response_cache.bump("post", instance.post_id)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.post_id, "like_count")
+        trending.record(instance.post_id, likes=1)
+
+
+def _recounted(origin):
+    """Whether a delete cascading from ``origin`` fixes counters itself.
+
+    Deleted posts need no counts and deleted users recount the posts they
+    engaged with, so only direct like and comment deletes decrement.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model in (Post, User)
+    return isinstance(origin, (Post, User))
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, origin=None, **kwargs):
+    if not _recounted(origin):
+        counters.increment(instance.post_id, "like_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.post_id, "comment_count")
+        trending.record(instance.post_id, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    if not _recounted(origin):
+        counters.increment(instance.post_id, "comment_count", -1)
+
+
+@receiver(pre_delete, sender=User)
+def remember_engaged_posts(sender, instance, **kwargs):
+    """Likes and comments of a deleted user cascade without decrements"""
+    instance._engaged_post_ids = set(
+        Like.objects.filter(user=instance).values_list("post_id", flat=True)
+    ) | set(
+        Comment.objects.filter(author=instance).values_list(
+            "post_id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=User)
+def recount_engaged_posts(sender, instance, **kwargs):
+    engaged = getattr(instance, "_engaged_post_ids", set())
+    if engaged:
+        counters.reconcile(engaged)
+
+
+@receiver(post_save, sender=Post)
+def index_hashtags(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields is None or "content" in update_fields:
+        sync_hashtags([instance])
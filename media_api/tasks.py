@@ -1,19 +1,179 @@
+from collections import Counter
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from media_api.models import Post
+from django.utils.dateparse import parse_datetime
+from media_api import (
+    counters,
+    images,
+    like_buffer,
+    scheduling,
+    timeline,
+    trending,
+    upload_sessions,
+)
+from media_api.models import Like, Post, UploadSession
 from django.contrib.auth import get_user_model
+from social_media_api import response_cache
 
 
 @shared_task
 def create_scheduled_post(content, user_id, scheduled_time):
+    """Legacy ETA task, kept for messages queued before ScheduledPost"""
+    if isinstance(scheduled_time, str):
+        # The datetime went through JSON serialization
+        scheduled_time = parse_datetime(scheduled_time)
     user = get_user_model()
     try:
         user = user.objects.get(id=user_id)
         # Перевірка, чи настав час для створення посту
         if timezone.now() >= scheduled_time:
-            Post.objects.create(author=user, content=content)
+            post = Post.objects.create(author=user, content=content)
+            fan_out_post.delay(post.id)
             return "Post created successfully"
         else:
             return "Scheduled time not reached yet"
     except user.DoesNotExist:
         return "User not found"
+
+
+@shared_task
+def publish_scheduled_posts():
+    """Publish the scheduled posts that are due and fan them out"""
+    post_ids = scheduling.publish_due()
+    for post_id in post_ids:
+        fan_out_post.delay(post_id)
+    return f"{len(post_ids)} scheduled posts published"
+
+
+@shared_task
+def fan_out_post(post_id):
+    """Push a new post into the home timelines of its author's followers"""
+    post = Post.objects.filter(id=post_id).only(
+        "id", "author_id", "created_at"
+    ).first()
+    if post is None:
+        return "Post not found"
+    delivered = timeline.fan_out(post)
+    return f"Post delivered to {delivered} timelines"
+
+
+@shared_task
+def backfill_timeline(user_id, author_id):
+    """Fill a timeline with recent posts of a newly followed author"""
+    added = timeline.backfill(user_id, author_id)
+    return f"{added} posts added to timeline"
+
+
+@shared_task
+def prune_timeline(user_id, author_id):
+    """Remove posts of an unfollowed author from a timeline"""
+    removed = timeline.prune(user_id, author_id)
+    return f"{removed} posts removed from timeline"
+
+
+@shared_task
+def prune_cleared_timelines(user_id, cleared_ids, reverse):
+    """Remove timeline entries of follow edges dropped by ``clear()``"""
+    removed = timeline.prune_cleared(user_id, cleared_ids, reverse)
+    return f"{removed} posts removed from timelines"
+
+
+@shared_task
+def reconcile_fanout(author_id):
+    """Drop or backfill entries of an author who crossed the fan-out limit"""
+    changed = timeline.reconcile_author(author_id)
+    return f"{changed} timeline entries reconciled"
+
+
+@shared_task
+def flush_like_buffer():
+    """Apply buffered like/unlike intents to the database in bulk"""
+    buffer = like_buffer.get_buffer()
+    intents = buffer.drain()
+    if not intents:
+        return "No buffered likes"
+
+    post_ids = Post.objects.filter(
+        id__in={post_id for post_id, _ in intents}
+    ).values_list("id", flat=True)
+    user_ids = get_user_model().objects.filter(
+        id__in={user_id for _, user_id in intents}
+    ).values_list("id", flat=True)
+    post_ids, user_ids = set(post_ids), set(user_ids)
+
+    likes, unlikes = [], []
+    applied_users = set()
+    for (post_id, user_id), liked in intents.items():
+        if post_id not in post_ids or user_id not in user_ids:
+            continue
+        applied_users.add(user_id)
+        if liked:
+            likes.append(Like(post_id=post_id, user_id=user_id))
+        else:
+            unlikes.append(Q(post_id=post_id, user_id=user_id))
+
+    with transaction.atomic():
+        # Likes that already exist are skipped and must not trend again
+        existing = set(
+            Like.objects.filter(
+                post_id__in={like.post_id for like in likes},
+                user_id__in={like.user_id for like in likes},
+            ).values_list("post_id", "user_id")
+        )
+        liked_posts = Counter(
+            like.post_id for like in likes
+            if (like.post_id, like.user_id) not in existing
+        )
+        Like.objects.bulk_create(
+            likes, ignore_conflicts=True, batch_size=1000
+        )
+        if unlikes:
+            Like.objects.filter(reduce(or_, unlikes)).delete()
+        counters.reconcile(post_ids)
+        # Intents are only forgotten once they are applied
+        transaction.on_commit(buffer.ack)
+    for post_id, total in liked_posts.items():
+        trending.record(post_id, likes=total)
+    for post_id in post_ids:
+        response_cache.bump("post", post_id)
+    # Bulk writes send no signals, so liked_posts lists are bumped here
+    for user_id in applied_users:
+        response_cache.bump("likes", user_id)
+    return f"Flushed {len(likes)} likes and {len(unlikes)} unlikes"
+
+
+@shared_task
+def refresh_trending():
+    """Roll engagement buckets up into the trending snapshots"""
+    scored = trending.refresh()
+    return f"Trending refreshed from {scored} posts"
+
+
+@shared_task
+def generate_post_image_variants(post_id):
+    """Render thumbnail and feed-size copies of a post image"""
+    post = Post.objects.filter(id=post_id).only("id", "image").first()
+    if post is None:
+        return "Post not found"
+    created = images.generate_variants(post)
+    response_cache.bump("post", post_id)
+    return f"{created} image variants generated"
+
+
+@shared_task
+def purge_upload_sessions():
+    """Delete upload sessions, and their chunks, older than the TTL"""
+    ttl = timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    cutoff = timezone.now() - ttl
+    expired = UploadSession.objects.filter(created_at__lt=cutoff)
+    for session in expired.only("id"):
+        upload_sessions.discard(session)
+    deleted, _ = expired.delete()
+    return f"{deleted} upload sessions purged"
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from media_api import batch
+from media_api.models import Comment, Hashtag, Like, Post
+
+BATCH_URL = reverse("media_api:batch")
+
+
+class BatchTests(TestCase):
+    """Test batched post, comment and like operations."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(author=self.user, content="First")
+
+    def send(self, *operations):
+        return self.client.post(
+            BATCH_URL, {"operations": operations}, format="json"
+        )
+
+    def test_mixed_batch_applied(self):
+        """Test every operation is applied and reported in order."""
+        res = self.send(
+            {"op": "create_post", "content": "Offline #sync"},
+            {"op": "create_comment", "post": self.post.id, "content": "Hi"},
+            {"op": "like", "post": self.post.id},
+            {"op": "like", "post": self.post.id},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in res.data["results"]],
+            [201, 201, 201, 200],
+        )
+        created = Post.objects.get(id=res.data["results"][0]["data"]["id"])
+        self.assertEqual(created.content, "Offline #sync")
+        self.assertTrue(Hashtag.objects.filter(name="sync").exists())
+        self.assertEqual(
+            res.data["results"][1]["data"]["id"], Comment.objects.get().id
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_like_then_unlike_leaves_no_like(self):
+        """Test like intents are replayed in order."""
+        res = self.send(
+            {"op": "like", "post": self.post.id},
+            {"op": "unlike", "post": self.post.id},
+        )
+
+        self.assertEqual(
+            [result["status"] for result in res.data["results"]], [201, 204]
+        )
+        self.assertFalse(Like.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_invalid_batch_applies_nothing(self):
+        """Test one invalid operation rejects the whole batch."""
+        res = self.send(
+            {"op": "create_post", "content": "Valid"},
+            {"op": "like", "post": self.post.id + 100},
+            {"op": "create_comment", "post": self.post.id + 100, "content": "?"},
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(set(res.data["operations"]), {1, 2})
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(BATCH_MAX_OPERATIONS=2)
+    def test_operation_limit(self):
+        """Test batches above BATCH_MAX_OPERATIONS are rejected."""
+        operation = {"op": "like", "post": self.post.id}
+
+        res = self.send(operation, operation, operation)
+
+        self.assertEqual(res.status_code, 400)
+
+    @override_settings(BATCH_MAX_OPERATIONS=2)
+    def test_operation_limit_checked_first(self):
+        """Test an oversized batch is rejected before its operations."""
+        res = self.send({"op": "bogus"}, {"op": "bogus"}, {"op": "bogus"})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.data["operations"],
+            ["Ensure this field has no more than 2 elements."],
+        )
+
+    def test_post_deleted_after_validation(self):
+        """Test a post gone by the time of the write is reported missing."""
+        operations = [
+            {"op": "create_post", "content": "Valid"},
+            {"op": "create_comment", "post": self.post.id, "content": "Hi"},
+        ]
+        self.post.delete()
+
+        with self.assertRaises(ValidationError) as raised:
+            batch.apply(self.user, operations)
+
+        self.assertEqual(set(raised.exception.detail["operations"]), {1})
+        self.assertFalse(Post.objects.exists())
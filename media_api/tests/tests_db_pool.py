@@ -0,0 +1,89 @@
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from social_media_api import db_pool
+
+
+class FakePool:
+    def __init__(self, **stats):
+        self.stats = stats
+
+    def pop_stats(self):
+        stats, self.stats = self.stats, {}
+        return stats
+
+
+@override_settings(DATABASE_POOL_STATS_INTERVAL=0)
+@mock.patch.object(db_pool, "pooled_aliases", lambda: ["default"])
+class PoolStatsTests(TestCase):
+    """Test pool counters are totalled across processes"""
+
+    def setUp(self):
+        cache.clear()
+
+    def report(self, **stats):
+        pools = [("default", FakePool(**stats))]
+        with mock.patch.object(db_pool, "pools", return_value=pools):
+            db_pool.report()
+
+    def test_reports_add_up(self):
+        """Test counters of every report are added to the totals"""
+        self.report(requests_num=10, requests_queued=2, requests_wait_ms=30)
+        self.report(requests_num=5, requests_queued=1, pool_size=4)
+
+        stats = db_pool.stats()["default"]
+
+        self.assertEqual(stats["requests_num"], 15)
+        self.assertEqual(stats["requests_queued"], 3)
+        self.assertEqual(stats["requests_wait_ms"], 30)
+        self.assertEqual(stats["requests_errors"], 0)
+        self.assertNotIn("pool_size", stats)
+
+    @override_settings(DATABASE_POOL_STATS_INTERVAL=60)
+    def test_reports_limited_per_interval(self):
+        """Test a process reports at most once per interval"""
+        db_pool._reported_at = 0.0
+        self.report(requests_num=10)
+        self.report(requests_num=5)
+
+        self.assertEqual(db_pool.stats()["default"]["requests_num"], 10)
+
+    def test_stats_command(self):
+        """Test the command shows saturation and average waits"""
+        self.report(requests_num=10, requests_queued=2, requests_wait_ms=30)
+        out = StringIO()
+
+        call_command("db_pool_stats", stdout=out)
+
+        self.assertIn("default: requests=10 queued=2", out.getvalue())
+        self.assertIn("saturation=20.00%", out.getvalue())
+        self.assertIn("avg_wait_ms=15.0", out.getvalue())
+
+
+class ResetAfterForkTests(TestCase):
+    """Test forked workers drop what they inherited without closing it"""
+
+    def test_inherited_connections_set_aside(self):
+        inherited_connection = mock.Mock()
+        inherited_pool = mock.Mock()
+        conn = SimpleNamespace(
+            alias="default",
+            connection=inherited_connection,
+            _connection_pools={"default": inherited_pool},
+        )
+        handler = mock.Mock(all=mock.Mock(return_value=[conn]))
+
+        with mock.patch.object(db_pool, "connections", handler):
+            db_pool.reset_after_fork()
+
+        self.assertIsNone(conn.connection)
+        self.assertEqual(conn._connection_pools, {})
+        self.assertIn(inherited_connection, db_pool._inherited)
+        self.assertIn(inherited_pool, db_pool._inherited)
+        inherited_connection.close.assert_not_called()
+        inherited_pool.close.assert_not_called()
@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from media_api.models import Post
+from social_media_api.db_router import (
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    using_primary,
+)
+from social_media_api.response_cache import cache_response
+from user.authentication import CachedJWTAuthentication, local_users
+
+REPLICAS = ["replica_0", "replica_1"]
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TestCase):
+    """Test reads are routed to replicas unless the client just wrote"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(self.record_alias)
+
+    def record_alias(self, request):
+        self.read_alias = self.router.db_for_read(Post)
+        self.write_alias = self.router.db_for_write(Post)
+        return HttpResponse()
+
+    def send(self, method, token="first"):
+        request = getattr(self.factory, method)(
+            "/api/media_api/posts/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.middleware(request)
+        return self.read_alias
+
+    def test_safe_methods_read_from_replica(self):
+        """Test GET reads go to a replica and writes to the primary"""
+        self.assertIn(self.send("get"), REPLICAS)
+        self.assertEqual(self.write_alias, "default")
+
+    def test_writes_read_from_primary(self):
+        """Test reads inside a write request use the primary"""
+        self.assertEqual(self.send("post"), "default")
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test a client reads its own writes from the primary"""
+        self.send("post")
+
+        self.assertEqual(self.send("get"), "default")
+        self.assertIn(self.send("get", token="other"), REPLICAS)
+
+    @override_settings(DATABASE_REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_expires(self):
+        """Test reads return to the replicas after the sticky window"""
+        self.send("post")
+
+        self.assertIn(self.send("get"), REPLICAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_use_primary(self):
+        """Test nothing changes when no replica is configured"""
+        self.assertEqual(self.send("get"), "default")
+
+    def test_outside_requests_read_from_primary(self):
+        """Test tasks and commands read from the primary"""
+        self.send("get")
+
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_using_primary_inside_replica_request(self):
+        """Test using_primary blocks read from the primary"""
+
+        def read_primary(request):
+            with using_primary():
+                return self.record_alias(request)
+
+        self.middleware = ReplicaRoutingMiddleware(read_primary)
+
+        self.assertEqual(self.send("get"), "default")
+
+    def test_response_cache_filled_from_primary(self):
+        """Test a response cache miss is never rendered from a replica"""
+
+        @cache_response("post", lambda view, request: [("post", 1)])
+        def retrieve(view, request):
+            self.record_alias(request)
+            return Response({})
+
+        self.middleware = ReplicaRoutingMiddleware(
+            lambda request: retrieve(None, Request(request))
+        )
+
+        self.assertEqual(self.send("get"), "default")
+
+    def test_auth_cache_filled_from_primary(self):
+        """Test users are loaded from the primary before being cached"""
+        local_users.clear()
+        user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        token = AccessToken.for_user(user)
+
+        def load_user(auth, validated_token):
+            self.record_alias(None)
+            return user
+
+        def authenticate(request):
+            with mock.patch.object(JWTAuthentication, "get_user", load_user):
+                CachedJWTAuthentication().get_user(token)
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(authenticate)
+
+        self.assertEqual(self.send("get"), "default")
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from media_api.hashtags import extract_hashtags
+from media_api.models import Post, PostHashtag
+
+POSTS_URL = reverse("media_api:post-list")
+
+
+class HashtagTests(TestCase):
+    """Test hashtag extraction and tag lookups."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_extract_hashtags(self):
+        """Test hashtags are parsed and normalized."""
+        self.assertEqual(
+            extract_hashtags("#Django and #django, #python3! a#b ##x"),
+            {"django", "python3"},
+        )
+
+    def test_post_save_indexes_hashtags(self):
+        """Test saving a post keeps its hashtag links in sync."""
+        post = Post.objects.create(author=self.user, content="#one #two")
+        post.content = "#two #three"
+        post.save()
+
+        self.assertEqual(
+            set(post.post_hashtags.values_list("hashtag__name", flat=True)),
+            {"two", "three"},
+        )
+
+    def test_filter_posts_by_tag(self):
+        """Test ?tag= returns tagged posts, newest first."""
+        first = Post.objects.create(author=self.user, content="#Django 1")
+        Post.objects.create(author=self.user, content="#python")
+        second = Post.objects.create(author=self.user, content="2 #django")
+
+        res = self.client.get(POSTS_URL, {"tag": "#DJANGO"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [second.id, first.id],
+        )
+
+    def test_backfill_command(self):
+        """Test the backfill command re-parses existing posts."""
+        post = Post.objects.create(author=self.user, content="#backfill")
+        PostHashtag.objects.all().delete()
+
+        call_command("backfill_hashtags", chunk_size=1, stdout=StringIO())
+
+        self.assertTrue(
+            PostHashtag.objects.filter(
+                post=post, hashtag__name="backfill"
+            ).exists()
+        )
@@ -0,0 +1,162 @@
+import struct
+import tempfile
+import zlib
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from media_api.models import Post, PostImageVariant
+from media_api.tasks import generate_post_image_variants
+
+
+def sample_image(size=(1600, 900), exif=True):
+    """Return an uploaded JPEG with EXIF metadata."""
+    image = Image.new("RGB", size, "red")
+    metadata = Image.Exif()
+    metadata[0x010F] = "Camera maker"
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", exif=metadata.tobytes() if exif else b"")
+    return SimpleUploadedFile(
+        "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    POST_IMAGE_VARIANTS={"thumbnail": 320, "feed": 1080},
+)
+class ImageVariantTests(TestCase):
+    """Test post image derivatives."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(
+            author=self.user, content="Photo", image=sample_image()
+        )
+
+    def test_variants_generated_without_exif(self):
+        """Test every size and format is rendered and EXIF is dropped."""
+        generate_post_image_variants(self.post.id)
+
+        variants = PostImageVariant.objects.filter(post=self.post)
+        self.assertEqual(
+            set(variants.values_list("size", "format")),
+            {
+                ("thumbnail", "webp"),
+                ("thumbnail", "jpeg"),
+                ("feed", "webp"),
+                ("feed", "jpeg"),
+            },
+        )
+        thumbnail = variants.get(size="thumbnail", format="jpeg")
+        self.assertEqual((thumbnail.width, thumbnail.height), (320, 180))
+        with thumbnail.image.open("rb") as stored:
+            self.assertFalse(Image.open(stored).getexif())
+
+    def test_srcset_in_serializer(self):
+        """Test variants are exposed as a srcset per format."""
+        generate_post_image_variants(self.post.id)
+
+        res = self.client.get(reverse("media_api:post-detail", args=[self.post.id]))
+
+        srcset = res.data["image_variants"]["webp"].split(", ")
+        self.assertEqual(len(srcset), 2)
+        self.assertTrue(srcset[0].endswith(" 320w"))
+        self.assertTrue(srcset[1].endswith(" 1080w"))
+
+    def test_variants_change_post_etag(self):
+        """Test a cached post detail is not revalidated without variants."""
+        url = reverse("media_api:post-detail", args=[self.post.id])
+        etag = self.client.get(url)["ETag"]
+
+        generate_post_image_variants(self.post.id)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.data["image_variants"])
+
+    def test_corrupt_image_removed_by_task(self):
+        """Test an image failing full verification is dropped from its post."""
+        header = sample_image().read()[:600]
+        post = Post.objects.create(
+            author=self.user,
+            content="Broken",
+            image=SimpleUploadedFile("broken.jpg", header),
+        )
+
+        generate_post_image_variants(post.id)
+
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertFalse(PostImageVariant.objects.filter(post=post).exists())
+
+
+def png_header(width, height):
+    """Return a PNG consisting of a signature and an IHDR chunk only."""
+    data = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = b"IHDR" + data
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(data))
+        + chunk
+        + struct.pack(">I", zlib.crc32(chunk))
+    )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class UploadValidationTests(TestCase):
+    """Test streamed uploads are checked before being stored."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, upload):
+        return self.client.post(
+            reverse("media_api:post-list"),
+            {"content": "Photo", "image": upload},
+            format="multipart",
+        )
+
+    def test_valid_image_accepted(self):
+        """Test a well-formed image is stored."""
+        res = self.create_post(sample_image())
+
+        self.assertEqual(res.status_code, 201)
+        self.assertTrue(Post.objects.get(id=res.data["id"]).image)
+
+    def test_not_an_image_rejected(self):
+        """Test a file without an image header is rejected."""
+        res = self.create_post(SimpleUploadedFile("fake.jpg", b"not an image"))
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("image", res.data)
+
+    def test_oversized_dimensions_rejected_from_header(self):
+        """Test dimensions are enforced without decoding the pixels."""
+        upload = SimpleUploadedFile("huge.png", png_header(60_000, 60_000))
+
+        res = self.create_post(upload)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("image", res.data)
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_file_rejected_while_streaming(self):
+        """Test uploads above FILE_UPLOAD_MAX_SIZE are refused."""
+        res = self.create_post(sample_image())
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Post.objects.exists())
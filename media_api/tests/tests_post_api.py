@@ -1,11 +1,25 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.urls import reverse
+from django.utils.http import http_date
 
 from media_api.models import Post, Like, Comment
 from media_api.serializers import PostSerializer
+from media_api.tasks import flush_like_buffer
+from social_media_api import response_cache
 
 POSTS_URL = reverse("media_api:post-list")
 
@@ -74,7 +88,9 @@ class PrivatePostApiTests(TestCase):
         serializer = PostSerializer(posts, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(sorted(res.data, key=lambda x: x["id"]), serializer.data)
+        self.assertEqual(
+            sorted(res.data["results"], key=lambda x: x["id"]), serializer.data
+        )
 
     def test_create_post(self):
         """Test creating a new post."""
@@ -154,7 +170,7 @@ class PrivatePostApiTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
 
     def test_update_comment(self):
         """Test updating a comment."""
@@ -179,3 +195,448 @@ class PrivatePostApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Comment.objects.filter(id=comment.id).exists())
+
+
+class PostPaginationTests(TestCase):
+    """Test keyset pagination of post lists."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_walks_all_pages(self):
+        """Test following next links returns every post once, newest first."""
+        posts = [
+            sample_post(author=self.user, content=f"Post {i}") for i in range(5)
+        ]
+
+        seen = []
+        res = self.client.get(POSTS_URL, {"page_size": 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            seen.extend(item["id"] for item in res.data["results"])
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(seen, [post.id for post in reversed(posts)])
+
+    @override_settings(PAGINATION_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        """Test the requested page size cannot exceed the configured cap."""
+        for i in range(5):
+            sample_post(author=self.user)
+
+        res = self.client.get(POSTS_URL, {"page_size": 50})
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        res = self.client.get(POSTS_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_walks_annotation_ordering(self):
+        """Test ranked results, ordered by an annotation, reach page 2."""
+        posts = [sample_post(author=self.user) for i in range(3)]
+
+        def ranked(queryset, query):
+            return queryset.annotate(
+                rank=Value(0.5, output_field=FloatField())
+            ).order_by("-rank", "-id")
+
+        with mock.patch("media_api.views.search.search_posts", ranked):
+            res = self.client.get(POSTS_URL, {"q": "post", "page_size": 2})
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [posts[0].id]
+        )
+
+    def test_cursor_values_validated(self):
+        """Test well-formed cursors with unusable values are rejected."""
+        sample_post(author=self.user)
+        for position in (["garbage", 1], [{}, 1], [None, 1], ["2024-01-01", "x"]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+
+            res = self.client.get(POSTS_URL, {"cursor": cursor.decode()})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostCounterTests(TestCase):
+    """Test denormalized like and comment counters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.post = sample_post(author=self.user)
+
+    def test_like_and_unlike_update_counter(self):
+        """Test liking and unliking keep like_count in step."""
+        self.client.post(reverse("media_api:post-like", args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        self.client.post(reverse("media_api:post-unlike", args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comments_update_counter(self):
+        """Test adding and deleting comments keep comment_count in step."""
+        self.client.post(
+            reverse("media_api:post-add-comment", args=[self.post.id]),
+            {"content": "Test comment", "post": self.post.id},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        comment = Comment.objects.get(post=self.post)
+        self.client.delete(comment_detail_url(comment.id))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_comment_cannot_move_to_other_post(self):
+        """Test updating a comment keeps it on its post and counter."""
+        comment = sample_comment(author=self.user, post=self.post)
+        other = sample_post(author=self.user)
+
+        res = self.client.patch(
+            comment_detail_url(comment.id), {"post": other.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        comment.refresh_from_db()
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(comment.post_id, self.post.id)
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(other.comment_count, 0)
+
+    def test_counters_in_response(self):
+        """Test counters are exposed on posts."""
+        Like.objects.create(post=self.post, user=self.user)
+
+        res = self.client.get(detail_url(self.post.id))
+
+        self.assertEqual(res.data["like_count"], 1)
+        self.assertEqual(res.data["comment_count"], 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test the reconcile command recounts drifted counters."""
+        sample_comment(author=self.user, post=self.post)
+        Post.objects.filter(id=self.post.id).update(
+            like_count=7, comment_count=0
+        )
+
+        out = StringIO()
+        call_command("reconcile_post_counters", batch_size=1, stdout=out)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertIn("1 posts", out.getvalue())
+
+    def test_post_delete_skips_counter_updates(self):
+        """Test cascaded likes and comments do not update their post."""
+        for i in range(5):
+            liker = sample_user(email=f"liker{i}@example.com", password="x")
+            Like.objects.create(post=self.post, user=liker)
+            sample_comment(author=liker, post=self.post)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.post.delete()
+
+        self.assertFalse(
+            [
+                query for query in queries.captured_queries
+                if query["sql"].startswith('UPDATE "media_api_post"')
+            ]
+        )
+
+    def test_user_delete_recounts_other_posts(self):
+        """Test deleting a user recounts the posts they engaged with."""
+        other = sample_user(email="other@example.com", password="testpass")
+        Like.objects.create(post=self.post, user=other)
+        sample_comment(author=other, post=self.post)
+
+        other.delete()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertEqual(self.post.comment_count, 0)
+
+
+class LikeUpsertTests(TestCase):
+    """Test idempotent and write-behind likes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.post = sample_post(author=self.user)
+        self.like_url = reverse("media_api:post-like", args=[self.post.id])
+        self.unlike_url = reverse("media_api:post-unlike", args=[self.post.id])
+
+    def test_like_twice_is_idempotent(self):
+        """Test liking an already liked post does not duplicate it."""
+        self.client.post(self.like_url)
+        res = self.client.post(self.like_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+    def test_unlike_not_liked_post(self):
+        """Test unliking a post that is not liked succeeds."""
+        res = self.client.post(self.unlike_url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    @override_settings(LIKE_WRITE_BEHIND=True, REDIS_URL=None)
+    def test_write_behind_like_flushed_in_bulk(self):
+        """Test buffered likes are applied by the flush task."""
+        other = sample_user(email="other@example.com", password="testpass")
+        res = self.client.post(self.like_url)
+        self.client.force_authenticate(user=other)
+        self.client.post(self.like_url)
+        self.client.post(self.unlike_url)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Like.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_like_buffer()
+
+        self.post.refresh_from_db()
+        self.assertEqual(
+            list(Like.objects.values_list("user", flat=True)), [self.user.id]
+        )
+        self.assertEqual(self.post.like_count, 1)
+
+    @override_settings(LIKE_WRITE_BEHIND=True, REDIS_URL=None)
+    def test_failed_flush_keeps_intents(self):
+        """Test intents of a failed flush are applied by the next one."""
+        self.client.post(self.like_url)
+
+        with mock.patch(
+            "media_api.tasks.counters.reconcile", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_like_buffer()
+        self.assertFalse(Like.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_like_buffer()
+
+        self.assertTrue(Like.objects.filter(user=self.user).exists())
+        self.assertEqual(flush_like_buffer(), "No buffered likes")
+
+    @override_settings(LIKE_WRITE_BEHIND=True, REDIS_URL=None)
+    def test_flushed_existing_like_not_trending(self):
+        """Test repeated likes of a liked post add no trending score."""
+        Like.objects.create(post=self.post, user=self.user)
+        self.client.post(self.like_url)
+
+        with mock.patch("media_api.tasks.trending.record") as record:
+            flush_like_buffer()
+
+        record.assert_not_called()
+        self.assertEqual(Like.objects.count(), 1)
+
+    @override_settings(LIKE_WRITE_BEHIND=True, REDIS_URL=None)
+    def test_flush_invalidates_liked_posts(self):
+        """Test flushed likes show up in a cached liked posts list."""
+        url = reverse("media_api:post-liked-posts")
+        self.assertEqual(self.client.get(url).data["results"], [])
+        self.client.post(self.like_url)
+
+        flush_like_buffer()
+
+        res = self.client.get(url)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [self.post.id]
+        )
+
+
+class PostSearchTests(TestCase):
+    """Test the ?q= post search."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_search_filters_posts(self):
+        """Test only posts matching the query are returned."""
+        match = sample_post(author=self.user, content="Learning Django today")
+        sample_post(author=self.user, content="Something else")
+
+        res = self.client.get(POSTS_URL, {"q": "django"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [match.id]
+        )
+
+
+class PostResponseCacheTests(TestCase):
+    """Test the versioned response cache on post reads."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.post = sample_post(author=self.user)
+
+    def test_retrieve_served_from_cache(self):
+        """Test a repeated read only runs the precondition query."""
+        self.client.get(detail_url(self.post.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.post.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["id"], self.post.id)
+        self.assertEqual(response_cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_like_invalidates_cached_post(self):
+        """Test writes bump the post version."""
+        self.client.get(detail_url(self.post.id))
+        Like.objects.create(post=self.post, user=self.user)
+
+        res = self.client.get(detail_url(self.post.id))
+
+        self.assertEqual(res.data["like_count"], 1)
+
+    def test_expanded_read_not_cached(self):
+        """Test embedded authors are never served from the cache."""
+        url = detail_url(self.post.id)
+        self.client.get(url, {"expand": "author"})
+        self.user.bio = "Updated"
+        self.user.save()
+
+        res = self.client.get(url, {"expand": "author"})
+
+        self.assertEqual(res.data["author"]["bio"], "Updated")
+        self.assertEqual(response_cache.stats(), {"hits": 0, "misses": 0})
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag handling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.post = sample_post(author=self.user)
+
+    def test_post_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        res = self.client.get(detail_url(self.post.id))
+
+        res = self.client.get(
+            detail_url(self.post.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_post_etag_changes_with_likes(self):
+        """Test engagement changes the post ETag."""
+        etag = self.client.get(detail_url(self.post.id))["ETag"]
+        Like.objects.create(post=self.post, user=self.user)
+
+        res = self.client.get(detail_url(self.post.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_if_modified_since_not_trusted(self):
+        """Test If-Modified-Since alone never yields a stale 304."""
+        res = self.client.get(detail_url(self.post.id))
+        self.assertNotIn("Last-Modified", res)
+        Like.objects.create(post=self.post, user=self.user)
+
+        res = self.client.get(
+            detail_url(self.post.id),
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["like_count"], 1)
+
+    def test_expanded_read_has_no_etag(self):
+        """Test ?expand= responses are not validated by the post alone."""
+        res = self.client.get(detail_url(self.post.id), {"expand": "author"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+
+    def test_comments_not_modified_until_new_comment(self):
+        """Test the comments ETag tracks new comments."""
+        url = reverse("media_api:post-comments", args=[self.post.id])
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        sample_comment(author=self.user, post=self.post)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class SparseFieldsetTests(TestCase):
+    """Test ?fields= and ?expand= on post, comment and like reads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.post = sample_post(author=self.user)
+
+    def test_fields_trim_payload_and_query(self):
+        """Test only requested fields are returned and loaded."""
+        with self.assertNumQueries(1):
+            res = self.client.get(POSTS_URL, {"fields": "id,content"})
+
+        self.assertEqual(set(res.data["results"][0]), {"id", "content"})
+
+    def test_expand_author(self):
+        """Test the author is embedded with one join."""
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                POSTS_URL, {"fields": "id,author", "expand": "author"}
+            )
+
+        author = res.data["results"][0]["author"]
+        self.assertEqual(author["email"], self.user.email)
+        self.assertEqual(author["id"], self.user.id)
+
+    def test_expand_like_relations(self):
+        """Test likes can embed their post and user."""
+        Like.objects.create(post=self.post, user=self.user)
+
+        res = self.client.get(
+            reverse("media_api:like-list"), {"expand": "post,user"}
+        )
+
+        like = res.data["results"][0]
+        self.assertEqual(like["post"]["content"], self.post.content)
+        self.assertEqual(like["user"]["email"], self.user.email)
+
+    def test_fields_ignored_on_write(self):
+        """Test trimming never drops fields of a write."""
+        res = self.client.post(
+            f"{POSTS_URL}?fields=id", {"content": "Written"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["content"], "Written")
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from media_api import scheduling
+from media_api.models import Hashtag, Post, ScheduledPost
+
+
+class ScheduledPostTests(TestCase):
+    """Test scheduled posts are stored and published by the beat task."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def schedule(self, content, publish_at):
+        return ScheduledPost.objects.create(
+            author=self.user, content=content, publish_at=publish_at
+        )
+
+    def test_schedule_post_stores_row(self):
+        """Test scheduling creates a pending row instead of an ETA task."""
+        publish_at = timezone.now() + timedelta(days=7)
+
+        res = self.client.post(
+            reverse("media_api:post-schedule-post"),
+            {"content": "Later", "scheduled_time": publish_at.isoformat()},
+        )
+
+        self.assertEqual(res.status_code, 202)
+        scheduled = ScheduledPost.objects.get(id=res.data["id"])
+        self.assertEqual(scheduled.publish_at, publish_at)
+        self.assertEqual(scheduled.status, ScheduledPost.Status.PENDING)
+
+    def test_schedule_post_in_past_rejected(self):
+        """Test a scheduled time in the past is rejected."""
+        res = self.client.post(
+            reverse("media_api:post-schedule-post"),
+            {
+                "content": "Too late",
+                "scheduled_time": (
+                    timezone.now() - timedelta(hours=1)
+                ).isoformat(),
+            },
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_publish_due(self):
+        """Test only due rows are published, with their hashtags."""
+        now = timezone.now()
+        due = self.schedule("Hello #launch", now - timedelta(minutes=1))
+        future = self.schedule("Not yet", now + timedelta(hours=1))
+
+        post_ids = scheduling.publish_due(now)
+
+        due.refresh_from_db()
+        future.refresh_from_db()
+        self.assertEqual(post_ids, [due.post_id])
+        self.assertEqual(due.status, ScheduledPost.Status.PUBLISHED)
+        self.assertEqual(future.status, ScheduledPost.Status.PENDING)
+        post = Post.objects.get(id=due.post_id)
+        self.assertEqual(post.content, "Hello #launch")
+        self.assertTrue(
+            Hashtag.objects.filter(
+                name="launch", post_hashtags__post=post
+            ).exists()
+        )
+        self.assertEqual(scheduling.publish_due(now), [])
+
+    def test_list_and_cancel(self):
+        """Test users see and can cancel their pending posts."""
+        scheduled = self.schedule("Later", timezone.now() + timedelta(days=1))
+        url = reverse("media_api:scheduledpost-list")
+
+        res = self.client.get(url)
+        self.assertEqual(
+            [row["id"] for row in res.data["results"]], [scheduled.id]
+        )
+
+        res = self.client.post(
+            reverse("media_api:scheduledpost-cancel", args=[scheduled.id])
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["status"], ScheduledPost.Status.CANCELLED)
+        self.assertEqual(scheduling.publish_due(scheduled.publish_at), [])
+
+        res = self.client.post(
+            reverse("media_api:scheduledpost-cancel", args=[scheduled.id])
+        )
+        self.assertEqual(res.status_code, 409)
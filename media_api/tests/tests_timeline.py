@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from media_api.models import Post, TimelineEntry
+from media_api import tasks
+from media_api.tasks import fan_out_post
+
+FOLLOWING_POSTS_URL = reverse("media_api:post-following-posts")
+
+
+def sample_user(**params):
+    """Create and return a sample user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class TimelineTests(TestCase):
+    """Test the fan-out-on-write home timeline."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="reader@example.com", password="pass")
+        self.author = sample_user(email="author@example.com", password="pass")
+        self.user.following.add(self.author)
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_post_schedules_fan_out(self):
+        """Test creating a post enqueues fan-out after commit."""
+        self.client.force_authenticate(user=self.author)
+        with mock.patch("media_api.views.fan_out_post.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse("media_api:post-list"), {"content": "Hello"}
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        delay.assert_called_once_with(res.data["id"])
+
+    def test_fan_out_fills_follower_timeline(self):
+        """Test fanned out posts are served from the timeline."""
+        post = Post.objects.create(author=self.author, content="Hello")
+
+        fan_out_post(post.id)
+        res = self.client.get(FOLLOWING_POSTS_URL)
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [post.id]
+        )
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=0)
+    def test_popular_author_merged_at_read(self):
+        """Test posts of authors over the fan-out limit are merged."""
+        post = Post.objects.create(author=self.author, content="Hello")
+
+        fan_out_post(post.id)
+        res = self.client.get(FOLLOWING_POSTS_URL)
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [post.id]
+        )
+
+    def run_follow_tasks(self, change):
+        """Apply a follow change and run the tasks it enqueues"""
+        names = (
+            "backfill_timeline",
+            "prune_timeline",
+            "prune_cleared_timelines",
+            "reconcile_fanout",
+        )
+        with mock.patch.multiple(
+            "media_api.signals",
+            **{
+                name: mock.Mock(delay=getattr(tasks, name))
+                for name in names
+            },
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+
+    def test_clear_prunes_timeline(self):
+        """Test clearing follows removes the posts of those authors."""
+        post = Post.objects.create(author=self.author, content="Hello")
+        fan_out_post(post.id)
+
+        self.run_follow_tasks(self.user.following.clear)
+
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_clear_followers_prunes_their_timelines(self):
+        """Test clearing an author's followers prunes each follower."""
+        post = Post.objects.create(author=self.author, content="Hello")
+        fan_out_post(post.id)
+
+        self.run_follow_tasks(self.author.followers.clear)
+
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_crossing_limit_reconciles_timelines(self):
+        """Test authors crossing the fan-out limit are reconciled."""
+        post = Post.objects.create(author=self.author, content="Hello")
+        fan_out_post(post.id)
+        other = sample_user(email="other@example.com", password="pass")
+
+        # Over the limit: entries go, posts are merged at read time
+        self.run_follow_tasks(lambda: other.following.add(self.author))
+        self.assertFalse(TimelineEntry.objects.exists())
+        res = self.client.get(FOLLOWING_POSTS_URL)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [post.id]
+        )
+
+        # Back under it: the remaining follower gets the posts pushed
+        self.run_follow_tasks(lambda: other.following.remove(self.author))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from media_api import trending
+from media_api.models import (
+    Comment,
+    EngagementBucket,
+    Like,
+    Post,
+    TrendingPost,
+)
+
+TRENDING_URL = reverse("media_api:post-trending")
+
+
+def sample_user(**params):
+    """Create and return a sample user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class TrendingTests(TestCase):
+    """Test the trending engine."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(email="testuser@example.com", password="pass")
+        self.other = sample_user(email="other@example.com", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_engagement_counted_in_minute_buckets(self):
+        """Test likes and comments land in the current minute bucket."""
+        post = Post.objects.create(author=self.user, content="#hot")
+        Like.objects.create(post=post, user=self.user)
+        Like.objects.create(post=post, user=self.other)
+        Comment.objects.create(post=post, author=self.user, content="Hi")
+
+        bucket = EngagementBucket.objects.get(post=post)
+        self.assertEqual((bucket.likes, bucket.comments), (2, 1))
+
+    def test_trending_reads_snapshot(self):
+        """Test the endpoint serves the refreshed snapshot by score."""
+        cold = Post.objects.create(author=self.user, content="#cold")
+        hot = Post.objects.create(author=self.user, content="#hot")
+        Like.objects.create(post=cold, user=self.user)
+        Like.objects.create(post=hot, user=self.user)
+        Like.objects.create(post=hot, user=self.other)
+
+        res = self.client.get(TRENDING_URL)
+        self.assertEqual(res.data["posts"], [])
+
+        trending.refresh()
+        res = self.client.get(TRENDING_URL, {"hashtags": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.data["posts"]], [hot.id, cold.id]
+        )
+        self.assertEqual(
+            [item["name"] for item in res.data["hashtags"]], ["hot", "cold"]
+        )
+
+    def test_old_engagement_expires(self):
+        """Test buckets outside the window are ignored and dropped."""
+        post = Post.objects.create(author=self.user, content="Old news")
+        EngagementBucket.objects.create(
+            post=post,
+            minute=timezone.now() - timedelta(days=2),
+            likes=100,
+        )
+
+        trending.refresh()
+
+        self.assertFalse(TrendingPost.objects.exists())
+        self.assertFalse(EngagementBucket.objects.exists())
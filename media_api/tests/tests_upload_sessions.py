@@ -0,0 +1,214 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from media_api import upload_sessions
+from media_api.models import Post, UploadSession
+
+CHUNK_SIZE = 1024
+
+
+def sample_bytes():
+    """Return a noisy PNG a few chunks long."""
+    image = Image.frombytes("L", (64, 64), os.urandom(64 * 64))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    UPLOAD_SESSION_ROOT=tempfile.mkdtemp(),
+    UPLOAD_SESSION_CHUNK_SIZE=CHUNK_SIZE,
+)
+class UploadSessionTests(TestCase):
+    """Test resumable chunked uploads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(author=self.user, content="Photo")
+        self.data = sample_bytes()
+
+    def create_session(self, **extra):
+        res = self.client.post(
+            reverse("media_api:uploadsession-list"),
+            {"filename": "photo.png", "size": len(self.data), **extra},
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.data
+
+    def put_chunk(self, session, index, body=None, **headers):
+        if body is None:
+            start = index * CHUNK_SIZE
+            body = self.data[start:start + CHUNK_SIZE]
+        return self.client.put(
+            reverse(
+                "media_api:uploadsession-upload-chunk",
+                args=[session["id"], index],
+            ),
+            data=body,
+            content_type="application/octet-stream",
+            headers=headers,
+        )
+
+    def finalize(self, session):
+        return self.client.post(
+            reverse("media_api:uploadsession-finalize", args=[session["id"]]),
+            {"post": self.post.id},
+        )
+
+    def test_resume_only_missing_chunks(self):
+        """Test status lists the chunks still to be sent."""
+        session = self.create_session()
+        count = session["chunk_count"]
+        self.assertGreater(count, 2)
+        self.assertEqual(session["missing_chunks"], list(range(count)))
+
+        for index in range(count):
+            if index != 1:
+                self.put_chunk(session, index)
+
+        res = self.client.get(
+            reverse("media_api:uploadsession-detail", args=[session["id"]])
+        )
+        self.assertEqual(res.data["missing_chunks"], [1])
+        self.assertEqual(self.finalize(session).status_code, 409)
+
+        res = self.put_chunk(session, 1)
+        self.assertEqual(res.data["missing_chunks"], [])
+
+    def test_finalize_attaches_image(self):
+        """Test the assembled file becomes the post image."""
+        session = self.create_session(
+            sha256=hashlib.sha256(self.data).hexdigest()
+        )
+        for index in range(session["chunk_count"]):
+            self.put_chunk(session, index)
+
+        res = self.finalize(session)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["status"], UploadSession.Status.COMPLETE)
+        self.post.refresh_from_db()
+        with self.post.image.open("rb") as stored:
+            self.assertEqual(stored.read(), self.data)
+        self.assertEqual(self.finalize(session).status_code, 409)
+
+    def test_checksum_mismatch_rejected(self):
+        """Test a declared SHA-256 is checked on finalize."""
+        session = self.create_session(sha256="0" * 64)
+        for index in range(session["chunk_count"]):
+            self.put_chunk(session, index)
+
+        res = self.finalize(session)
+
+        self.assertEqual(res.status_code, 400)
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+        self.assertEqual(
+            UploadSession.objects.get(id=session["id"]).status,
+            UploadSession.Status.OPEN,
+        )
+
+    def test_post_deleted_while_finalizing(self):
+        """Test a post deleted during the copy is reported, not a 500."""
+        session = self.create_session()
+        for index in range(session["chunk_count"]):
+            self.put_chunk(session, index)
+        assemble = upload_sessions.assemble
+
+        def assemble_then_delete(upload_session):
+            Post.objects.filter(pk=self.post.pk).delete()
+            return assemble(upload_session)
+
+        with mock.patch.object(
+            upload_sessions, "assemble", assemble_then_delete
+        ):
+            res = self.finalize(session)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("post", res.data)
+        self.assertEqual(
+            UploadSession.objects.get(id=session["id"]).status,
+            UploadSession.Status.OPEN,
+        )
+
+    def test_finalizing_session_locked(self):
+        """Test a session being finalized takes no finalize or delete."""
+        session = self.create_session()
+        UploadSession.objects.filter(id=session["id"]).update(
+            status=UploadSession.Status.FINALIZING
+        )
+
+        self.assertEqual(self.finalize(session).status_code, 409)
+        res = self.client.delete(
+            reverse("media_api:uploadsession-detail", args=[session["id"]])
+        )
+        self.assertEqual(res.status_code, 409)
+
+    @override_settings(UPLOAD_SESSION_MAX_OPEN=1)
+    def test_open_sessions_capped_per_user(self):
+        """Test a user cannot keep more than the allowed open sessions."""
+        self.create_session()
+
+        res = self.client.post(
+            reverse("media_api:uploadsession-list"),
+            {"filename": "photo.png", "size": len(self.data)},
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_chunk_with_wrong_length_rejected(self):
+        """Test a truncated chunk is not stored."""
+        session = self.create_session()
+
+        res = self.put_chunk(session, 0, body=b"short")
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            upload_sessions.received_chunks(
+                UploadSession.objects.get(id=session["id"])
+            ),
+            set(),
+        )
+
+    def test_content_range_must_match_index(self):
+        """Test the offset of a chunk is checked against its number."""
+        session = self.create_session()
+        size = len(self.data)
+
+        res = self.put_chunk(
+            session, 1, content_range=f"bytes 0-{CHUNK_SIZE - 1}/{size}"
+        )
+        self.assertEqual(res.status_code, 400)
+
+        res = self.put_chunk(
+            session,
+            1,
+            content_range=f"bytes {CHUNK_SIZE}-{2 * CHUNK_SIZE - 1}/{size}",
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_finalize_into_foreign_post_forbidden(self):
+        """Test the image can only be attached to own posts."""
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass"
+        )
+        self.post = Post.objects.create(author=other, content="Not mine")
+        session = self.create_session()
+
+        res = self.finalize(session)
+
+        self.assertEqual(res.status_code, 403)
@@ -0,0 +1,204 @@
+"""Fan-out-on-write home timeline.
+
+New posts are pushed into one ``TimelineEntry`` row per follower, so
+reading a home timeline is a single range scan over the
+``(user, -created_at, -post)`` index. Authors with more followers than
+``TIMELINE_FANOUT_FOLLOWER_LIMIT`` are never fanned out; their posts are
+merged into the timeline at read time instead. When an author crosses
+the limit, ``reconcile_author`` drops or backfills their entries.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+
+from media_api.models import Post, TimelineEntry
+from social_media_api import response_cache
+from user.models import User
+
+Follow = User.followers.through
+
+
+def follower_ids(author_id):
+    """Return ids of users following ``author_id`` straight from the edges"""
+    return Follow.objects.filter(from_user_id=author_id).values_list(
+        "to_user_id", flat=True
+    )
+
+
+def is_fanout_author(author_id):
+    """Whether posts of ``author_id`` are pushed on write"""
+    return User.objects.filter(
+        id=author_id,
+        followers_count__lte=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT,
+    ).exists()
+
+
+def merge_at_read_author_ids(user):
+    """Ids of followed authors whose posts are merged at read time"""
+    return list(
+        user.following.filter(
+            followers_count__gt=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+        ).values_list("id", flat=True)
+    )
+
+
+def _deliver(entries):
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    for entry in entries:
+        response_cache.bump("feed", entry.user_id)
+    return len(entries)
+
+
+def fan_out(post):
+    """Push ``post`` into the timelines of its author's followers"""
+    if not is_fanout_author(post.author_id):
+        return 0
+
+    batch_size = settings.TIMELINE_FANOUT_BATCH_SIZE
+    delivered = 0
+    batch = []
+    for user_id in follower_ids(post.author_id).iterator(
+        chunk_size=batch_size
+    ):
+        batch.append(
+            TimelineEntry(
+                user_id=user_id, post_id=post.id, created_at=post.created_at
+            )
+        )
+        if len(batch) >= batch_size:
+            delivered += _deliver(batch)
+            batch = []
+    if batch:
+        delivered += _deliver(batch)
+    return delivered
+
+
+def backfill(user_id, author_id):
+    """Copy recent posts of a newly followed author into a timeline"""
+    if not is_fanout_author(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-created_at", "-id"
+    )[: settings.TIMELINE_BACKFILL_SIZE]
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in posts.values_list("id", "created_at")
+    ]
+    return _deliver(entries)
+
+
+def prune(user_id, author_id):
+    """Drop posts of an unfollowed author from a timeline"""
+    deleted, _ = TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    response_cache.bump("feed", user_id)
+    return deleted
+
+
+def prune_cleared(user_id, cleared_ids, reverse):
+    """Drop the entries of follow edges removed by ``clear()``"""
+    if reverse:
+        # ``user.following.clear()``: user_id is the follower
+        entries = TimelineEntry.objects.filter(
+            user_id=user_id, post__author_id__in=cleared_ids
+        )
+        followers = {user_id}
+    else:
+        entries = TimelineEntry.objects.filter(
+            user_id__in=cleared_ids, post__author_id=user_id
+        )
+        followers = set(cleared_ids)
+    deleted, _ = entries.delete()
+    for pk in followers:
+        response_cache.bump("feed", pk)
+    return deleted
+
+
+def reconcile_author(author_id):
+    """Match the entries of an author to their side of the fan-out limit.
+
+    Authors who went over the limit are merged at read time, so their
+    entries are dropped. Authors who fell back under it get their recent
+    posts delivered to every follower, unless that already happened.
+    """
+    if not is_fanout_author(author_id):
+        entries = TimelineEntry.objects.filter(post__author_id=author_id)
+        user_ids = set(entries.values_list("user_id", flat=True))
+        deleted, _ = entries.delete()
+        for pk in user_ids:
+            response_cache.bump("feed", pk)
+        return deleted
+
+    posts = list(
+        Post.objects.filter(author_id=author_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: settings.TIMELINE_BACKFILL_SIZE]
+    )
+    if not posts or TimelineEntry.objects.filter(post_id=posts[0][0]).exists():
+        return 0
+
+    batch_size = settings.TIMELINE_FANOUT_BATCH_SIZE
+    delivered = 0
+    batch = []
+    for user_id in follower_ids(author_id).iterator(chunk_size=batch_size):
+        batch.extend(
+            TimelineEntry(user_id=user_id, post_id=post_id, created_at=at)
+            for post_id, at in posts
+        )
+        if len(batch) >= batch_size:
+            delivered += _deliver(batch)
+            batch = []
+    if batch:
+        delivered += _deliver(batch)
+    return delivered
+
+
+def _before(queryset, before, created_field, id_field):
+    created_at, post_id = before
+    return queryset.filter(
+        Q(**{f"{created_field}__lt": created_at})
+        | Q(**{created_field: created_at, f"{id_field}__lt": post_id})
+    )
+
+
+def read_timeline(user, limit=None, before=None):
+    """Return posts of the home timeline of ``user``, newest first.
+
+    ``before`` is an optional ``(created_at, post_id)`` keyset bound.
+    """
+    entries = (
+        TimelineEntry.objects.filter(user=user)
+        .select_related("post__author")
+        .prefetch_related("post__image_variants")
+        .order_by("-created_at", "-post_id")
+    )
+    if before is not None:
+        entries = _before(entries, before, "created_at", "post_id")
+    if limit is not None:
+        entries = entries[:limit]
+    posts = [entry.post for entry in entries]
+
+    author_ids = merge_at_read_author_ids(user)
+    if not author_ids:
+        return posts
+
+    pulled = (
+        Post.objects.filter(author_id__in=author_ids)
+        .select_related("author")
+        .prefetch_related("image_variants")
+        .order_by("-created_at", "-id")
+    )
+    if before is not None:
+        pulled = _before(pulled, before, "created_at", "id")
+    if limit is not None:
+        pulled = pulled[:limit]
+
+    merged = {post.id: post for post in posts}
+    merged.update((post.id, post) for post in pulled)
+    posts = sorted(
+        merged.values(),
+        key=lambda post: (post.created_at, post.id),
+        reverse=True
+    )
+    return posts if limit is None else posts[:limit]
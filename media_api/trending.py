@@ -0,0 +1,108 @@
+"""Sliding-window trending engine.
+
+Likes and comments are counted into per-minute ``EngagementBucket`` rows as
+they happen. ``refresh`` periodically folds the buckets of the last
+``TRENDING_WINDOW_HOURS`` into exponentially decayed scores and replaces the
+``TrendingPost`` / ``TrendingHashtag`` snapshots, which are all the request
+path ever reads.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from media_api.models import (
+    EngagementBucket,
+    PostHashtag,
+    TrendingHashtag,
+    TrendingPost,
+)
+
+COMMENT_WEIGHT = 2
+
+
+def record(post_id, likes=0, comments=0):
+    """Add engagement of ``post_id`` to the bucket of the current minute"""
+    minute = timezone.now().replace(second=0, microsecond=0)
+    buckets = EngagementBucket.objects.filter(post_id=post_id, minute=minute)
+    increments = {
+        "likes": F("likes") + likes,
+        "comments": F("comments") + comments,
+    }
+    if buckets.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            EngagementBucket.objects.create(
+                post_id=post_id, minute=minute, likes=likes, comments=comments
+            )
+    except IntegrityError:
+        # Another request created the bucket first
+        buckets.update(**increments)
+
+
+def score_posts(now):
+    """Time-decayed engagement of every post active within the window"""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    since = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    scores = defaultdict(float)
+    buckets = EngagementBucket.objects.filter(minute__gte=since).values_list(
+        "post_id", "minute", "likes", "comments"
+    )
+    for post_id, minute, likes, comments in buckets.iterator(
+        chunk_size=5000
+    ):
+        age = (now - minute).total_seconds()
+        weight = 0.5 ** (age / half_life)
+        scores[post_id] += (likes + COMMENT_WEIGHT * comments) * weight
+    return scores
+
+
+def score_hashtags(post_scores, chunk_size=1000):
+    scores = defaultdict(float)
+    post_ids = list(post_scores)
+    for start in range(0, len(post_ids), chunk_size):
+        links = PostHashtag.objects.filter(
+            post_id__in=post_ids[start:start + chunk_size]
+        ).values_list("post_id", "hashtag_id")
+        for post_id, hashtag_id in links:
+            scores[hashtag_id] += post_scores[post_id]
+    return scores
+
+
+def top(scores):
+    return heapq.nlargest(
+        settings.TRENDING_SIZE, scores.items(), key=itemgetter(1)
+    )
+
+
+def refresh(now=None):
+    """Recompute the trending snapshots and drop expired buckets"""
+    now = now or timezone.now()
+    post_scores = score_posts(now)
+    hashtag_scores = score_hashtags(post_scores)
+
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            TrendingPost(post_id=post_id, score=score, computed_at=now)
+            for post_id, score in top(post_scores)
+        )
+        TrendingHashtag.objects.all().delete()
+        TrendingHashtag.objects.bulk_create(
+            TrendingHashtag(
+                hashtag_id=hashtag_id, score=score, computed_at=now
+            )
+            for hashtag_id, score in top(hashtag_scores)
+        )
+
+    EngagementBucket.objects.filter(
+        minute__lt=now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    ).delete()
+    return len(post_scores)
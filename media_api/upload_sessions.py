@@ -0,0 +1,121 @@
+"""Resumable chunked uploads.
+
+Chunk ``n`` of an ``UploadSession`` covers the bytes starting at
+``n * chunk_size`` and is stored as ``UPLOAD_SESSION_ROOT/<session>/<n>``.
+The files on disk are the only record of what has been received, so a
+client whose connection dropped asks for the missing chunks and resends
+just those. Finalizing streams the chunks, in order, into one temporary
+file; nothing is ever held in memory whole.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class ChunkError(ValueError):
+    pass
+
+
+def session_dir(session):
+    return os.path.join(settings.UPLOAD_SESSION_ROOT, str(session.id))
+
+
+def chunk_path(session, index):
+    return os.path.join(session_dir(session), str(index))
+
+
+def chunk_length(session, index):
+    return min(session.chunk_size, session.size - index * session.chunk_size)
+
+
+def check_content_range(session, index, header):
+    """Validate a ``Content-Range: bytes start-end/total`` chunk header"""
+    match = CONTENT_RANGE_RE.match(header)
+    if match is None:
+        raise ChunkError("Content-Range must be 'bytes start-end/total'")
+    start, end, total = map(int, match.groups())
+    offset = index * session.chunk_size
+    last = offset + chunk_length(session, index) - 1
+    if (start, end, total) != (offset, last, session.size):
+        raise ChunkError(
+            f"Chunk {index} covers bytes {offset}-{last}/{session.size}"
+        )
+
+
+def write_chunk(session, index, stream):
+    """Store chunk ``index`` read from ``stream``, replacing any earlier one"""
+    if not 0 <= index < session.chunk_count:
+        raise ChunkError(
+            f"Chunk index must be between 0 and {session.chunk_count - 1}"
+        )
+    expected = chunk_length(session, index)
+    directory = session_dir(session)
+    os.makedirs(directory, exist_ok=True)
+
+    written = 0
+    with tempfile.NamedTemporaryFile(
+        dir=directory, suffix=".part", delete=False
+    ) as part:
+        while written <= expected:
+            block = stream.read(
+                min(COPY_BUFFER_SIZE, expected + 1 - written)
+            )
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+    if written != expected:
+        os.remove(part.name)
+        raise ChunkError(f"Chunk {index} must be exactly {expected} bytes")
+    # Only complete chunks ever appear under their final name
+    os.replace(part.name, chunk_path(session, index))
+
+
+def received_chunks(session):
+    try:
+        entries = os.scandir(session_dir(session))
+    except FileNotFoundError:
+        return set()
+    with entries:
+        return {
+            int(entry.name)
+            for entry in entries
+            if entry.name.isdigit()
+            and entry.stat().st_size == chunk_length(session, int(entry.name))
+        }
+
+
+def missing_chunks(session):
+    received = received_chunks(session)
+    return [
+        index for index in range(session.chunk_count)
+        if index not in received
+    ]
+
+
+def assemble(session):
+    """Concatenate the chunks into a temporary file; return it and SHA-256"""
+    sha256 = hashlib.sha256()
+    assembled = tempfile.NamedTemporaryFile(
+        dir=session_dir(session), suffix=".upload"
+    )
+    for index in range(session.chunk_count):
+        with open(chunk_path(session, index), "rb") as chunk:
+            while block := chunk.read(COPY_BUFFER_SIZE):
+                sha256.update(block)
+                assembled.write(block)
+    assembled.seek(0)
+    return assembled, sha256.hexdigest()
+
+
+def discard(session):
+    shutil.rmtree(session_dir(session), ignore_errors=True)
@@ -1,16 +1,26 @@
 from django.urls import path, include
 from rest_framework import routers
 
-from media_api.views import PostViewSet, LikeViewSet, CommentViewSet
+from media_api.views import (
+    BatchView,
+    PostViewSet,
+    LikeViewSet,
+    CommentViewSet,
+    ScheduledPostViewSet,
+    UploadSessionViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register("posts", PostViewSet)
 router.register("comments", CommentViewSet)
 router.register("likes", LikeViewSet)
+router.register("scheduled-posts", ScheduledPostViewSet)
+router.register("upload-sessions", UploadSessionViewSet)
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("batch/", BatchView.as_view(), name="batch"),
     path(
         "posts/<int:post_id>/add-comment/",
         PostViewSet.as_view({"post": "create_comment"}),
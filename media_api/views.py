@@ -1,33 +1,177 @@
-from django.utils.dateparse import parse_datetime
-from rest_framework import filters, status
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
+from rest_framework import filters, mixins, serializers, status
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.generics import get_object_or_404
 
-from media_api.tasks import create_scheduled_post
+from media_api import (
+    batch,
+    hashtags,
+    like_buffer,
+    search,
+    timeline,
+    upload_sessions,
+)
+from media_api.tasks import (
+    fan_out_post,
+    generate_post_image_variants,
+)
 
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from media_api.models import Post, Comment, Like
+from media_api.models import (
+    Post,
+    Comment,
+    Like,
+    ScheduledPost,
+    TrendingHashtag,
+    TrendingPost,
+    UploadSession,
+)
 from media_api.serializers import (
+    BatchSerializer,
     PostSerializer,
     CommentSerializer,
     LikeSerializer,
+    ScheduledPostSerializer,
+    TrendingHashtagSerializer,
+    UploadFinalizeSerializer,
+    UploadSessionSerializer,
+)
+from social_media_api.conditional import conditional_response
+from social_media_api.fieldsets import (
+    SparseFieldsViewMixin,
+    optimize_queryset,
 )
+from social_media_api.response_cache import cache_response
+from social_media_api.uploads import HeaderValidatedImageField
+
+
+def post_validators(view, request, pk=None, **kwargs):
+    try:
+        row = (
+            Post.objects.filter(pk=pk)
+            # The image task replaces variants without touching updated_at
+            .annotate(last_variant=Max("image_variants__id"))
+            .values_list(
+                "updated_at",
+                "like_count",
+                "comment_count",
+                "image",
+                "last_variant",
+            )
+            .first()
+        )
+    except (TypeError, ValueError):
+        return None
+    return row
+
+
+def comments_validators(view, request, pk=None, **kwargs):
+    try:
+        row = (
+            Post.objects.filter(pk=pk)
+            .annotate(
+                last_updated=Max("comments__updated_at"),
+                total=Count("comments"),
+            )
+            .values_list("last_updated", "total")
+            .first()
+        )
+    except (TypeError, ValueError):
+        return None
+    return row
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.select_related("author").prefetch_related(
-        "comments", "likes"
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Ranked full-text search in post content, "
+                "supports \"phrases\" and prefix* words (ex. ?q=django)",
+            ),
+            OpenApiParameter(
+                "tag",
+                type=OpenApiTypes.STR,
+                description="Posts with a hashtag, newest first "
+                "(ex. ?tag=django)",
+            ),
+        ]
+    )
+)
+class PostViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = (
+        Post.objects.select_related("author")
+        .prefetch_related("image_variants")
+        .defer("search_vector")
     )
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ["content"]
+    # Actions opt into their own rate, see DEFAULT_THROTTLE_RATES
+    throttle_scope = None
+
+    def get_throttles(self):
+        params = self.request.query_params
+        if self.action == "list" and (params.get("q") or params.get("search")):
+            self.throttle_scope = "search"
+        return super().get_throttles()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query = self.request.query_params.get("q")
+        if query and self.action == "list":
+            queryset = search.search_posts(queryset, query)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        tag = request.query_params.get("tag")
+        if tag is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(hashtags.tagged_post_links(tag))
+        serializer = self.get_serializer(
+            [link.post for link in page], many=True
+        )
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        transaction.on_commit(lambda: fan_out_post.delay(post.id))
+        if post.image:
+            transaction.on_commit(
+                lambda: generate_post_image_variants.delay(post.id)
+            )
+
+    def perform_update(self, serializer):
+        post = serializer.save()
+        if "image" in serializer.validated_data:
+            transaction.on_commit(
+                lambda: generate_post_image_variants.delay(post.id)
+            )
+
+    @conditional_response(post_validators)
+    @cache_response(
+        "post", lambda view, request, **kwargs: [("post", kwargs["pk"])]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
         post = self.get_object()
@@ -48,31 +192,38 @@ class PostViewSet(viewsets.ModelViewSet):
         methods=["get"],
         permission_classes=[IsAuthenticated]
     )
+    @cache_response(
+        "feed", lambda view, request: [("author", request.user.id)]
+    )
     def my_posts(self, request):
         """Retrieve all posts of current user"""
         posts = (
             Post.objects.filter(author=request.user)
             .select_related("author")
-            .prefetch_related("comments", "likes")
+            .prefetch_related("image_variants")
         )
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.sparse(posts))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated]
     )
+    @cache_response("feed", lambda view, request: [("feed", request.user.id)])
     def following_posts(self, request):
         """Retrieve all posts of users they are following"""
-        following_users = request.user.following.all()
-        posts = (
-            Post.objects.filter(author__in=following_users)
-            .select_related("author")
-            .prefetch_related("comments", "likes")
+        page = self.paginator.paginate_source(
+            lambda limit, position: timeline.read_timeline(
+                request.user, limit=limit, before=position
+            ),
+            request,
+            Post.objects.all(),
+            ordering=("-created_at", "-id"),
         )
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         detail=True,
@@ -82,12 +233,18 @@ class PostViewSet(viewsets.ModelViewSet):
     def like(self, request, pk=None):
         post = self.get_object()
         user = request.user
-        if Like.objects.filter(post=post, user=user).exists():
+        if settings.LIKE_WRITE_BEHIND:
+            like_buffer.get_buffer().push(post.id, user.id, liked=True)
+            return Response(
+                {"message": "Post like accepted"},
+                status=status.HTTP_202_ACCEPTED
+            )
+        _, created = Like.objects.get_or_create(post=post, user=user)
+        if not created:
             return Response(
-                {"error": "Post already liked"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"message": "Post already liked"},
+                status=status.HTTP_200_OK
             )
-        Like.objects.create(post=post, user=user)
         return Response(
             {"message": "Post liked successfully"},
             status=status.HTTP_201_CREATED
@@ -101,24 +258,61 @@ class PostViewSet(viewsets.ModelViewSet):
     def unlike(self, request, pk=None):
         post = self.get_object()
         user = request.user
-        like = Like.objects.filter(post=post, user=user).first()
-        if not like:
+        if settings.LIKE_WRITE_BEHIND:
+            like_buffer.get_buffer().push(post.id, user.id, liked=False)
             return Response(
-                {"error": "Post not liked"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"message": "Post unlike accepted"},
+                status=status.HTTP_202_ACCEPTED
             )
-        like.delete()
+        Like.objects.filter(post=post, user=user).delete()
         return Response(
             {"message": "Post unliked successfully"},
             status=status.HTTP_204_NO_CONTENT
         )
 
     @action(detail=False, methods=["GET"])
+    @cache_response("feed", lambda view, request: [("likes", request.user.id)])
     def liked_posts(self, request):
         user = request.user
-        liked_posts = Post.objects.filter(likes__user=user)
-        serializer = self.get_serializer(liked_posts, many=True)
-        return Response(serializer.data)
+        liked_posts = (
+            Post.objects.filter(likes__user=user)
+            .select_related("author")
+            .prefetch_related("image_variants")
+        )
+        page = self.paginate_queryset(self.sparse(liked_posts))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "hashtags",
+                type=OpenApiTypes.BOOL,
+                description="Include trending hashtags (ex. ?hashtags=true)",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["GET"], pagination_class=None)
+    def trending(self, request):
+        """Retrieve the precomputed trending posts and hashtags"""
+        trending_posts = (
+            TrendingPost.objects.select_related("post__author")
+            .prefetch_related("post__image_variants")
+            .defer("post__search_vector")
+            .order_by("-score")
+        )
+        serializer = self.get_serializer(
+            [entry.post for entry in trending_posts], many=True
+        )
+        data = {"posts": serializer.data}
+        if request.query_params.get("hashtags") in ("true", "1"):
+            trending_hashtags = TrendingHashtag.objects.select_related(
+                "hashtag"
+            ).order_by("-score")
+            data["hashtags"] = TrendingHashtagSerializer(
+                trending_hashtags, many=True
+            ).data
+        return Response(data)
 
     @action(
         detail=True,
@@ -135,47 +329,41 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["GET"])
+    @conditional_response(comments_validators)
     def comments(self, request, pk=None):
         """Retrieve all comments for a specific post"""
         post = self.get_object()
-        comments = Comment.objects.filter(post=post)
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = optimize_queryset(
+            Comment.objects.filter(post=post),
+            CommentSerializer,
+            request,
+            ordering=self.paginator.ordering,
+        )
+        page = self.paginate_queryset(comments)
+        serializer = CommentSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
 
+    @extend_schema(
+        request=ScheduledPostSerializer,
+        responses={202: ScheduledPostSerializer},
+    )
     @action(
         detail=False,
         methods=["POST"],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        throttle_scope="schedule",
     )
     def schedule_post(self, request):
         """Schedule creation of post"""
-        content = request.data.get("content")
-        scheduled_time_str = request.data.get("scheduled_time")
-
-        # Перетворення рядка в datetime
-        scheduled_time = parse_datetime(scheduled_time_str)
+        serializer = ScheduledPostSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(author=request.user)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-        if not content or not scheduled_time:
-            return Response(
-                {
-                    "error": "It is necessary to fill out "
-                    "content and time of scheduled post"
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Планування завдання
-        create_scheduled_post.apply_async(
-            (content, request.user.id, scheduled_time), eta=scheduled_time
-        )
 
-        return Response(
-            {"message": "Post will be created in scheduled time"},
-            status=status.HTTP_202_ACCEPTED,
-        )
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all().select_related("author", "post")
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
@@ -200,6 +388,211 @@ class CommentViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class LikeViewSet(viewsets.ModelViewSet):
+class LikeViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Like.objects.select_related("user", "post")
     serializer_class = LikeSerializer
+
+
+class ScheduledPostViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Posts of the current user waiting to be published"""
+
+    queryset = ScheduledPost.objects.order_by("publish_at")
+    serializer_class = ScheduledPostSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset.filter(author=self.request.user)
+
+    @action(detail=True, methods=["POST"])
+    def cancel(self, request, pk=None):
+        """Cancel a scheduled post that has not been published yet"""
+        with transaction.atomic():
+            # Waits for a publisher holding the row, then sees its result
+            scheduled = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=pk
+            )
+            if scheduled.status != ScheduledPost.Status.PENDING:
+                return Response(
+                    {"error": f"Scheduled post is {scheduled.status}"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            scheduled.status = ScheduledPost.Status.CANCELLED
+            scheduled.save(update_fields=["status"])
+        return Response(self.get_serializer(scheduled).data)
+
+
+class UploadSessionViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Resumable upload of a post image in numbered chunks"""
+
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(
+            owner=self.request.user,
+            chunk_size=settings.UPLOAD_SESSION_CHUNK_SIZE,
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status == UploadSession.Status.FINALIZING:
+            return self.finalized_response(session)
+        self.perform_destroy(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_destroy(self, instance):
+        upload_sessions.discard(instance)
+        instance.delete()
+
+    def finalized_response(self, session):
+        return Response(
+            {"error": f"Upload session is {session.status}"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    @extend_schema(request={"application/octet-stream": bytes})
+    @action(
+        detail=True,
+        methods=["PUT"],
+        url_path=r"chunks/(?P<index>\d+)",
+    )
+    def upload_chunk(self, request, pk=None, index=None):
+        """Store one chunk, sent as the raw request body"""
+        session = self.get_object()
+        if session.status != UploadSession.Status.OPEN:
+            return self.finalized_response(session)
+        index = int(index)
+        try:
+            content_range = request.headers.get("Content-Range")
+            if content_range is not None:
+                upload_sessions.check_content_range(
+                    session, index, content_range
+                )
+            upload_sessions.write_chunk(
+                session, index, request.stream or BytesIO()
+            )
+        except upload_sessions.ChunkError as error:
+            return Response(
+                {"error": str(error)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            {"missing_chunks": upload_sessions.missing_chunks(session)}
+        )
+
+    def reopen(self, session):
+        # Let the client retry, or delete the session
+        UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.Status.FINALIZING
+        ).update(status=UploadSession.Status.OPEN)
+
+    def store_assembled(self, session, post):
+        """Assemble the chunks and save them as the file of ``post.image``"""
+        assembled, digest = upload_sessions.assemble(session)
+        with assembled:
+            if session.sha256 and digest != session.sha256:
+                raise serializers.ValidationError(
+                    {"sha256": "Assembled file does not match"}
+                )
+            try:
+                image = HeaderValidatedImageField().run_validation(
+                    File(assembled, name=session.filename)
+                )
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError({"image": error.detail})
+            post.image.save(session.filename, image, save=False)
+
+    @extend_schema(request=UploadFinalizeSerializer)
+    @action(detail=True, methods=["POST"])
+    def finalize(self, request, pk=None):
+        """Assemble the chunks and attach the file as the image of a post.
+
+        The session is claimed as finalizing in a short transaction and
+        the file is copied outside of it, so no row lock is held while up
+        to ``UPLOAD_SESSION_MAX_SIZE`` bytes are written.
+        """
+        serializer = UploadFinalizeSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        post = serializer.validated_data["post"]
+
+        with transaction.atomic():
+            session = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=pk
+            )
+            if session.status != UploadSession.Status.OPEN:
+                return self.finalized_response(session)
+            missing = upload_sessions.missing_chunks(session)
+            if missing:
+                return Response(
+                    {"missing_chunks": missing},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            session.status = UploadSession.Status.FINALIZING
+            session.save(update_fields=["status"])
+
+        try:
+            self.store_assembled(session, post)
+            with transaction.atomic():
+                if not Post.objects.select_for_update().filter(
+                    pk=post.pk
+                ).exists():
+                    post.image.delete(save=False)
+                    raise serializers.ValidationError(
+                        {"post": "The post no longer exists"}
+                    )
+                post.save(update_fields=["image", "updated_at"])
+                session.status = UploadSession.Status.COMPLETE
+                session.post = post
+                session.save(update_fields=["status", "post"])
+                transaction.on_commit(
+                    lambda: upload_sessions.discard(session)
+                )
+                transaction.on_commit(
+                    lambda: generate_post_image_variants.delay(post.id)
+                )
+        except serializers.ValidationError as error:
+            self.reopen(session)
+            return Response(error.detail, status=status.HTTP_400_BAD_REQUEST)
+        except BaseException:
+            self.reopen(session)
+            raise
+
+        return Response(self.get_serializer(session).data)
+
+
+class BatchView(APIView):
+    """Apply many post, comment and like operations in one transaction"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=BatchSerializer)
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = batch.apply(
+            request.user, serializer.validated_data["operations"]
+        )
+        context = {"request": request}
+        for result in results:
+            instance = result.pop("instance", None)
+            if isinstance(instance, Post):
+                result["data"] = PostSerializer(instance, context=context).data
+            elif isinstance(instance, Comment):
+                result["data"] = CommentSerializer(
+                    instance, context=context
+                ).data
+        return Response({"results": results})
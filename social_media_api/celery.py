@@ -16,6 +16,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Connect the pool reset of forked workers and the pool metrics
+from social_media_api import db_pool  # noqa: E402, F401
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
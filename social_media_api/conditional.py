@@ -0,0 +1,60 @@
+"""Conditional GET support (``ETag``).
+
+A view method decorated with ``conditional_response`` first runs a cheap
+precondition query that returns the values its representation depends on.
+A client that already holds that version gets a ``304 Not Modified``
+without anything being loaded or serialized.
+
+No ``Last-Modified`` is sent: counters and deletions change
+representations without moving any timestamp, and HTTP dates only have
+whole seconds, so ``If-Modified-Since`` could answer 304 for stale data.
+Requests with ``?expand=`` embed related rows the validators do not
+cover and are always answered in full.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+
+from social_media_api.fieldsets import requested
+
+
+def make_etag(request, parts):
+    raw = repr((request.get_full_path(), request.accepted_media_type, parts))
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def conditional_response(validators):
+    """Answer conditional GETs of a view method from ``validators``.
+
+    ``validators(view, request, **kwargs)`` returns the parts describing
+    the current representation, or ``None`` when the object does not exist
+    and the view should handle it.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if requested(request, "expand"):
+                return method(view, request, *args, **kwargs)
+            parts = validators(view, request, **kwargs)
+            if parts is None:
+                return method(view, request, *args, **kwargs)
+
+            etag = make_etag(request, parts)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response["ETag"] = etag
+            return response
+
+        return wrapper
+
+    return decorator
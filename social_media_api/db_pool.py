@@ -0,0 +1,109 @@
+"""Pooled PostgreSQL connections: fork safety and pool metrics.
+
+Each web and Celery worker process keeps psycopg pools configured by
+``OPTIONS["pool"]``; ``CONN_HEALTH_CHECKS`` pre-pings connections as they
+are handed out and ``max_lifetime`` recycles them. Forked Celery workers
+set aside what they inherited and open their own pools.
+
+Every ``DATABASE_POOL_STATS_INTERVAL`` seconds a process adds its pool
+counters to totals in the shared cache, which ``db_pool_stats`` shows.
+"""
+
+import logging
+import time
+
+from celery.signals import task_postrun, worker_process_init
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = (
+    "requests_num",
+    "requests_queued",
+    "requests_wait_ms",
+    "requests_errors",
+    "connections_num",
+    "connections_lost",
+    "returns_bad",
+)
+
+# Inherited connections must outlive the child, see reset_after_fork
+_inherited = []
+_reported_at = 0.0
+
+
+def stat_key(alias, name):
+    return f"db_pool:{alias}:{name}"
+
+
+def pooled_aliases():
+    return [
+        alias
+        for alias, database in settings.DATABASES.items()
+        if database.get("OPTIONS", {}).get("pool")
+    ]
+
+
+def pools():
+    """Yield ``(alias, pool)`` of the connection pools of this process"""
+    for conn in connections.all(initialized_only=True):
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            yield conn.alias, pool
+
+
+def _add(key, value):
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        cache.add(key, value, timeout=None)
+
+
+@receiver(request_finished)
+@task_postrun.connect
+def report(**kwargs):
+    """Publish the pool counters of this process, at most once an interval"""
+    global _reported_at
+    now = time.monotonic()
+    if now - _reported_at < settings.DATABASE_POOL_STATS_INTERVAL:
+        return
+    _reported_at = now
+    for alias, pool in pools():
+        pool_stats = pool.pop_stats()
+        for name in COUNTERS:
+            if pool_stats.get(name):
+                _add(stat_key(alias, name), pool_stats[name])
+        logger.info("Connection pool %s: %s", alias, pool_stats)
+
+
+def stats():
+    """Return ``{alias: {counter: total}}`` published by every process"""
+    totals = {}
+    for alias in pooled_aliases():
+        keys = {stat_key(alias, name): name for name in COUNTERS}
+        values = cache.get_many(keys)
+        totals[alias] = {
+            name: values.get(key, 0) for key, name in keys.items()
+        }
+    return totals
+
+
+@worker_process_init.connect
+def reset_after_fork(**kwargs):
+    """Start a forked Celery worker without the parent's connections.
+
+    Inherited connections share their sockets with the parent, so closing
+    them here would close them for the parent too. They are kept
+    referenced instead so garbage collection never closes them either.
+    """
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is not None:
+            _inherited.append(conn.connection)
+            conn.connection = None
+        inherited_pools = getattr(conn, "_connection_pools", {})
+        if conn.alias in inherited_pools:
+            _inherited.append(inherited_pools.pop(conn.alias))
@@ -0,0 +1,85 @@
+"""Read replica routing with read-your-writes stickiness.
+
+``ReplicaRoutingMiddleware`` lets reads of safe-method requests go to one
+of ``DATABASE_REPLICAS``, picked per request so a response never mixes
+replicas lagging by different amounts. After a client sends a write, its
+reads stay on the primary for ``DATABASE_REPLICA_STICKY_SECONDS`` so it
+sees its own changes. Clients are recognized by a hash of their
+``Authorization`` header or session cookie.
+
+Everything outside such requests, Celery tasks and management commands
+included, reads from the primary. So do ``using_primary`` blocks: reads
+whose results go into a shared cache, such as response cache misses and
+auth cache fills, must not store a lagging replica's rows for everyone.
+"""
+
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_read_alias = ContextVar("read_alias", default=None)
+
+
+@contextmanager
+def using_primary():
+    """Send the reads of the block to the primary"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == "default"
+
+
+def sticky_key(request):
+    credentials = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f"db_sticky:{digest}"
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def read_alias(self, request, key):
+        replicas = settings.DATABASE_REPLICAS
+        if request.method not in SAFE_METHODS or not replicas:
+            return None
+        if key is not None and cache.get(key):
+            return None
+        return random.choice(replicas)
+
+    def __call__(self, request):
+        key = sticky_key(request)
+        token = _read_alias.set(self.read_alias(request, key))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if request.method not in SAFE_METHODS and key is not None:
+            cache.set(key, True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,141 @@
+"""Sparse fieldsets (``?fields=``) and embedded relations (``?expand=``).
+
+``SparseFieldsMixin`` trims a serializer to the requested fields and
+swaps expanded relations for nested serializers. ``SparseFieldsViewMixin``
+then rewrites the queryset of the view to match: ``only()`` the columns
+those fields read, ``select_related`` the expanded relations and
+``prefetch_related`` only what the remaining fields need.
+
+Serializers declare the extra information in ``Meta``:
+
+* ``expandable_fields``: ``{name: serializer_class}`` embedded on expand
+* ``field_prefetches``: ``{name: [lookup, ...]}`` for method fields
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested(request, param):
+    """Names listed in a comma separated query parameter, or ``None``"""
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+def _applies(request):
+    return request is not None and request.method in SAFE_METHODS
+
+
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if not _applies(request):
+            return
+
+        wanted = requested(request, "fields")
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in requested(request, "expand") or ():
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name](read_only=True)
+
+
+def _model_field(model, name):
+    """Concrete, non many-to-many field ``name`` of ``model`` or ``None``"""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not field.concrete or field.many_to_many:
+        return None
+    return field
+
+
+def _columns(serializer, model, prefix=""):
+    """Return the ``only()`` paths and prefetches ``serializer`` reads"""
+    columns = {prefix + model._meta.pk.name}
+    prefetches = []
+    field_prefetches = getattr(serializer.Meta, "field_prefetches", {})
+    for name, field in serializer.fields.items():
+        prefetches.extend(
+            prefix + lookup for lookup in field_prefetches.get(name, ())
+        )
+        source = field.source.split(".")[0]
+        if source == "*":
+            continue
+        try:
+            relation = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        if relation.many_to_many:
+            prefetches.append(prefix + source)
+        elif relation.concrete:
+            columns.add(prefix + source)
+    return columns, prefetches
+
+
+def optimize_queryset(queryset, serializer_class, request, ordering=()):
+    """Restrict ``queryset`` to what the requested fields serialize"""
+    if not _applies(request):
+        return queryset
+    fields = requested(request, "fields")
+    expand = requested(request, "expand")
+    if fields is None and not expand:
+        return queryset
+
+    serializer = serializer_class(context={"request": request})
+    model = queryset.model
+    expandable = getattr(serializer.Meta, "expandable_fields", {})
+    expanded = [
+        name for name in serializer.fields
+        if name in expandable and name in (expand or ())
+    ]
+    columns, prefetches = _columns(serializer, model)
+    nested_prefetches = []
+    for name in expanded:
+        nested_columns, lookups = _columns(
+            serializer.fields[name],
+            model._meta.get_field(name).related_model,
+            prefix=f"{name}__",
+        )
+        columns |= nested_columns
+        nested_prefetches.extend(lookups)
+
+    if fields is None:
+        # Every field is serialized: keep the view's own optimizations
+        if expanded:
+            queryset = queryset.select_related(*expanded)
+        return queryset.prefetch_related(*nested_prefetches)
+
+    # Keyset pagination reads the ordering fields of every row
+    for name in (*queryset.query.order_by, *ordering):
+        if _model_field(model, name.lstrip("-")):
+            columns.add(name.lstrip("-"))
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if expanded:
+        queryset = queryset.select_related(*expanded)
+    return queryset.prefetch_related(*prefetches, *nested_prefetches).only(
+        *columns
+    )
+
+
+class SparseFieldsViewMixin:
+    """Apply ``optimize_queryset`` to the queryset of a view"""
+
+    def sparse(self, queryset):
+        return optimize_queryset(
+            queryset,
+            self.get_serializer_class(),
+            self.request,
+            ordering=getattr(self.paginator, "ordering", ()) or (),
+        )
+
+    def get_queryset(self):
+        return self.sparse(super().get_queryset())
@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opaque-cursor pagination over a unique ordering.
+
+    The cursor stores the ordering values of the last row of a page and the
+    next page is selected with a keyset comparison against them, so every
+    page costs one index range scan no matter how deep the client scrolls.
+    Querysets that are already ordered keep their ordering; ``ordering`` is
+    used otherwise. The primary key is always appended as a tie-breaker.
+    """
+
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            requested = None
+        if requested is not None and requested > 0:
+            page_size = requested
+        return min(page_size, settings.PAGINATION_MAX_PAGE_SIZE)
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or self.ordering)
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            descending = ordering[-1].startswith("-")
+            ordering.append("-pk" if descending else "pk")
+        return ordering
+
+    @staticmethod
+    def ordering_field(queryset, name):
+        """Field behind an ordering name: an annotation or a model path"""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        model = queryset.model
+        *relations, name = name.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        if name == "pk":
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        # Values go straight into lookups, so they must fit their fields
+        try:
+            values = [
+                self.ordering_field(queryset, field.lstrip("-")).to_python(
+                    value
+                )
+                for field, value in zip(self.ordering, position)
+            ]
+        except (FieldDoesNotExist, TypeError, ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, item):
+        position = []
+        for field in self.ordering:
+            value = getattr(item, field.lstrip("-"))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return base64.urlsafe_b64encode(
+            json.dumps(position).encode()
+        ).decode()
+
+    def keyset_filter(self, position):
+        """Build the "strictly after ``position``" condition"""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        def fetch(limit, position):
+            page = queryset
+            if position is not None:
+                page = page.filter(self.keyset_filter(position))
+            return list(page[:limit])
+
+        return self.paginate_source(fetch, request, queryset)
+
+    def paginate_source(self, fetch, request, queryset, ordering=None):
+        """Paginate a ``fetch(limit, position)`` source of ``queryset`` rows
+
+        Cursor values are checked against the fields and annotations of
+        ``queryset`` that ``ordering`` names.
+        """
+        if ordering is not None:
+            self.ordering = list(ordering)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        rows = fetch(
+            self.page_size + 1, self.decode_cursor(request, queryset)
+        )
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
@@ -0,0 +1,126 @@
+"""Versioned cache for serialized GET responses.
+
+A cached response is keyed by its full path and the current value of every
+version counter it depends on, e.g. ``("post", 42)`` or ``("feed", 7)``.
+Writers bump the counters (one ``incr``) instead of hunting for keys to
+delete, so invalidation is O(1); entries built on old versions are simply
+never read again and expire with their TTL.
+
+Misses are rendered from the primary (see ``using_primary``), so a
+lagging replica never stores an outdated body under a new version.
+
+Responses to ``?expand=`` requests embed related rows whose changes bump
+none of those counters, so they are never cached.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from social_media_api.db_router import using_primary
+from social_media_api.fieldsets import requested
+
+STATS_KEYS = {
+    "hits": "response_cache:hits",
+    "misses": "response_cache:misses",
+}
+
+
+def version_key(scope, pk):
+    return f"response_cache:version:{scope}:{pk}"
+
+
+def _count(stat):
+    try:
+        cache.incr(STATS_KEYS[stat])
+    except ValueError:
+        cache.add(STATS_KEYS[stat], 1, timeout=None)
+
+
+def bump(scope, pk):
+    """Invalidate every cached response depending on ``(scope, pk)``"""
+    key = version_key(scope, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Unknown or evicted counter: restart from a value never used before
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_versions(scopes):
+    keys = [version_key(scope, pk) for scope, pk in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def response_key(request, scopes, versions):
+    """Key a response by what it depends on, not only by its path.
+
+    Paths such as ``/api/user/me/`` are shared by every user and version
+    values may coincide, so the scopes, the user and the negotiated media
+    type are part of the key too.
+    """
+    raw = repr(
+        (
+            request.get_full_path(),
+            getattr(request.user, "pk", None),
+            getattr(request, "accepted_media_type", None),
+            [
+                (scope, str(pk), version)
+                for (scope, pk), version in zip(scopes, versions)
+            ],
+        )
+    )
+    return "response_cache:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def stats():
+    return {name: cache.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def cache_response(kind, scopes):
+    """Cache successful GET responses of a view method.
+
+    ``scopes(view, request, *args, **kwargs)`` returns the
+    ``(scope, pk)`` version counters the response depends on and
+    ``RESPONSE_CACHE_TTL[kind]`` is the lifetime of an entry.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED or requested(
+                request, "expand"
+            ):
+                return method(view, request, *args, **kwargs)
+
+            depends_on = scopes(view, request, *args, **kwargs)
+            versions = get_versions(depends_on)
+            key = response_key(request, depends_on, versions)
+            data = cache.get(key)
+            if data is not None:
+                _count("hits")
+                return Response(data)
+
+            _count("misses")
+            with using_primary():
+                response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(
+                    key, response.data, settings.RESPONSE_CACHE_TTL[kind]
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from datetime import timedelta
 from pathlib import Path
+
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()  # take environment variables
@@ -42,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework_simplejwt.token_blacklist",
     "drf_spectacular",
     "debug_toolbar",
@@ -53,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "social_media_api.db_router.ReplicaRoutingMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,7 +98,75 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Pooled connections are pre-pinged as they are handed out
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Sizes are per process: every web and Celery worker has a pool
+            "pool": {
+                "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+                "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+                "max_lifetime": 30 * 60,
+                "max_idle": 10 * 60,
+            },
+        },
+    }
+}
+
+# Read replicas, e.g. POSTGRES_REPLICA_HOSTS=replica1,replica2. Safe-method
+# requests read from one of them unless the client wrote within the last
+# DATABASE_REPLICA_STICKY_SECONDS. In tests they mirror the primary, so
+# POSTGRES_REPLICA_HOSTS=localhost gives a second local connection.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+# Seconds between reports of the pool counters of a process
+DATABASE_POOL_STATS_INTERVAL = 60
+
+DATABASE_ROUTERS = ["social_media_api.db_router.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.getenv("DATABASE_REPLICA_STICKY_SECONDS", 5)
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10_000},
+        }
+    }
+
+# Seconds cached GET responses live per kind; versions invalidate earlier.
+# Lists are only invalidated by membership changes: "feed" lists (home
+# timeline, own and liked posts) may show post content and like/comment
+# counts up to their TTL old, so keep that TTL short.
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_TTL = {
+    "post": 300,
+    "profile": 300,
+    "feed": 30,
 }
 
 
@@ -144,6 +216,32 @@ MEDIA_ROOT = "/files/media"
 
 MEDIA_URL = "/media/"
 
+# Uploads are streamed to temporary files (never buffered in memory) and
+# only their image header is checked in the request worker
+FILE_UPLOAD_HANDLERS = ["social_media_api.uploads.StreamingUploadHandler"]
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+DATA_UPLOAD_MAX_SIZE = FILE_UPLOAD_MAX_SIZE + 1024 * 1024
+IMAGE_UPLOAD_FORMATS = ("JPEG", "PNG", "WEBP", "GIF")
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+
+# Resumable uploads: chunks are kept on disk until the session is finalized
+UPLOAD_SESSION_ROOT = "/files/upload_sessions"
+UPLOAD_SESSION_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_SESSION_MAX_SIZE = 100 * 1024 * 1024
+UPLOAD_SESSION_TTL_HOURS = 24
+# Sessions not yet finalized, per user
+UPLOAD_SESSION_MAX_OPEN = 10
+
+# Unreferenced avatar files are swept after the grace period
+AVATAR_ORPHAN_GRACE_SECONDS = 60 * 60
+AVATAR_SWEEP_BATCH_SIZE = 500
+
+# Longest edge in pixels of each derivative rendered from Post.image
+POST_IMAGE_VARIANTS = {
+    "thumbnail": 320,
+    "feed": 1080,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -152,15 +250,25 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "social_media_api.throttling.SlidingAnonRateThrottle",
+        "social_media_api.throttling.SlidingUserRateThrottle",
+        "social_media_api.throttling.SlidingScopedRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "100/day",
+        "user": "1000/day",
+        "search": "30/min",
+        "schedule": "20/hour",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
+    "DEFAULT_PAGINATION_CLASS": "social_media_api.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
+PAGINATION_MAX_PAGE_SIZE = 100
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "social_media_api",
     "DESCRIPTION": "Documentation for social_media_api",
@@ -174,16 +282,100 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Users resolved from access tokens: per-process LRU entries live for
+# AUTH_USER_LOCAL_TTL seconds, shared cache entries for AUTH_USER_CACHE_TTL
+AUTH_USER_LOCAL_TTL = 5
+AUTH_USER_LOCAL_SIZE = 1024
+AUTH_USER_CACHE_TTL = 5 * 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=10),
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "user.serializers.TokenVerifySerializer",
 }
 
+# Blacklisted refresh tokens: each process checks a Bloom filter first and
+# queries the blacklist only on a hit. The filter is rebuilt to drop expired
+# tokens; blacklisted rows this many ids back are re-read on catch-up.
+# Other processes learn of new blacklistings through the shared cache, so
+# without REDIS_URL every check queries the blacklist instead.
+TOKEN_BLACKLIST_BLOOM_ENABLED = bool(REDIS_URL)
+TOKEN_BLACKLIST_BLOOM_CAPACITY = 100_000
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS = 60 * 60
+TOKEN_BLACKLIST_BLOOM_ID_OVERLAP = 1000
+TOKEN_BLACKLIST_PURGE_BATCH_SIZE = 1000
+
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
 CELERY_TIMEZONE = "Europe/Kyiv"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    "publish-scheduled-posts": {
+        "task": "media_api.tasks.publish_scheduled_posts",
+        "schedule": 30.0,
+    },
+    "flush-like-buffer": {
+        "task": "media_api.tasks.flush_like_buffer",
+        "schedule": 5.0,
+    },
+    "refresh-trending": {
+        "task": "media_api.tasks.refresh_trending",
+        "schedule": 60.0,
+    },
+    "purge-upload-sessions": {
+        "task": "media_api.tasks.purge_upload_sessions",
+        "schedule": 60.0 * 60,
+    },
+    "compute-follow-suggestions": {
+        "task": "user.tasks.compute_follow_suggestions",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "sweep-orphaned-avatars": {
+        "task": "user.tasks.sweep_orphaned_avatars",
+        "schedule": 60.0 * 60,
+    },
+    "purge-expired-tokens": {
+        "task": "user.tasks.purge_expired_tokens",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
+
+# Home timeline: posts of authors with more followers than the limit are
+# merged at read time instead of being fanned out on write.
+TIMELINE_FANOUT_FOLLOWER_LIMIT = int(
+    os.getenv("TIMELINE_FANOUT_FOLLOWER_LIMIT", 10_000)
+)
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_BACKFILL_SIZE = 100
+
+# Largest number of operations accepted by /api/media_api/batch/
+BATCH_MAX_OPERATIONS = 100
+
+# Due scheduled posts are claimed and published in batches of this size
+SCHEDULED_POST_BATCH_SIZE = 500
+
+# Largest number of user ids accepted by /api/user/follow/bulk/
+FOLLOW_BULK_MAX_USERS = 500
+
+# "Who to follow": top FOLLOW_SUGGESTION_SIZE friends-of-friends per user,
+# ignoring intermediaries following more than FOLLOW_SUGGESTION_HUB_LIMIT
+FOLLOW_SUGGESTION_SIZE = 20
+FOLLOW_SUGGESTION_HUB_LIMIT = 5000
+FOLLOW_SUGGESTION_POPULARITY_WEIGHT = 0.5
+FOLLOW_SUGGESTION_BATCH_SIZE = 1000
+
+# Buffer like/unlike in REDIS_URL and apply them with flush_like_buffer
+LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND") == "True"
+
+# Trending: engagement of the last TRENDING_WINDOW_HOURS, halved every
+# TRENDING_HALF_LIFE_HOURS, top TRENDING_SIZE posts and hashtags
+TRENDING_WINDOW_HOURS = 24
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_SIZE = 50
@@ -0,0 +1,146 @@
+"""Approximate sliding-window rate throttles in a shared store.
+
+Each throttle key counts requests in fixed windows of the rate's duration.
+The sliding count is the current window plus the previous one weighted
+by how much of it still overlaps the sliding window, the way a rolling
+limit would see it. A check reads both counters and increments the
+current one only when the request is allowed.
+
+With ``REDIS_URL`` this is one Lua script call, atomic across every web
+process. Without it the default cache stands in, which only suits
+development and tests.
+"""
+
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    UserRateThrottle,
+)
+
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if previous * tonumber(ARGV[2]) + current >= tonumber(ARGV[1]) then
+    return {0, previous, current}
+end
+current = redis.call("INCR", KEYS[1])
+if current == 1 then
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+end
+return {1, previous, current}
+"""
+
+
+def window_keys(key, duration, now):
+    """Return ``(current key, previous key, elapsed share of window)``"""
+    window, elapsed = divmod(now, duration)
+    # The hash tag keeps both windows of a key on one Redis Cluster slot
+    prefix = f"throttle:{{{key}}}"
+    return (
+        f"{prefix}:{int(window)}",
+        f"{prefix}:{int(window) - 1}",
+        elapsed / duration,
+    )
+
+
+class CacheWindowCounter:
+    def hit(self, key, limit, duration):
+        """Count a request; return ``(allowed, previous, current)``"""
+        current_key, previous_key, elapsed = window_keys(
+            key, duration, time.time()
+        )
+        counts = cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        if previous * (1 - elapsed) + current >= limit:
+            return False, previous, current
+        if cache.add(current_key, 1, 2 * duration):
+            return True, previous, 1
+        return True, previous, cache.incr(current_key)
+
+
+class RedisWindowCounter:
+    def __init__(self, url):
+        self._script = redis.Redis.from_url(url).register_script(
+            SLIDING_WINDOW_SCRIPT
+        )
+
+    def hit(self, key, limit, duration):
+        """Count a request; return ``(allowed, previous, current)``"""
+        current_key, previous_key, elapsed = window_keys(
+            key, duration, time.time()
+        )
+        allowed, previous, current = self._script(
+            keys=[current_key, previous_key],
+            args=[limit, 1 - elapsed, 2 * duration],
+        )
+        return bool(allowed), previous, current
+
+
+_counters = {}
+
+
+def get_counter():
+    url = settings.REDIS_URL
+    if url not in _counters:
+        _counters[url] = (
+            RedisWindowCounter(url) if url else CacheWindowCounter()
+        )
+    return _counters[url]
+
+
+def retry_after(limit, duration, previous, current, now):
+    """Seconds until the sliding count drops below ``limit``"""
+    elapsed = now % duration
+    if current < limit and previous:
+        # The previous window's weight has to decay far enough first
+        weight = (limit - current) / previous
+        return max(duration * (1 - weight) - elapsed, 0)
+    return duration - elapsed
+
+
+class SlidingWindowThrottleMixin:
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, previous, current = get_counter().hit(
+            self.key, self.num_requests, self.duration
+        )
+        self.wait_seconds = None if allowed else retry_after(
+            self.num_requests, self.duration, previous, current, time.time()
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SlidingAnonRateThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SlidingUserRateThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    pass
+
+
+class SlidingScopedRateThrottle(
+    SlidingWindowThrottleMixin, ScopedRateThrottle
+):
+    """Rates of views naming a ``throttle_scope``, e.g. search"""
+
+    def allow_request(self, request, view):
+        # ScopedRateThrottle resolves the rate per view, before counting
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
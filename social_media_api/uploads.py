@@ -0,0 +1,105 @@
+"""Memory-bounded upload ingestion.
+
+``StreamingUploadHandler`` writes every uploaded file straight to a
+temporary file, hashing it on the way and refusing anything larger than
+``FILE_UPLOAD_MAX_SIZE``. ``HeaderValidatedImageField`` then only parses the
+image header (format and dimensions) in the request worker; decoding and
+full verification are left to the background image tasks, which use
+``load_verified``.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+# What Pillow raises for files it cannot parse
+IMAGE_ERRORS = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+
+
+class UploadTooLarge(MultiPartParserError):
+    pass
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk with a hard size cap and a SHA-256 digest"""
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        if content_length > settings.DATA_UPLOAD_MAX_SIZE:
+            raise UploadTooLarge(
+                f"Request body exceeds {settings.DATA_UPLOAD_MAX_SIZE} bytes"
+            )
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            raise UploadTooLarge(
+                f"Uploaded file exceeds {settings.FILE_UPLOAD_MAX_SIZE} bytes"
+            )
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HeaderValidatedImageField(serializers.FileField):
+    """Image upload checked from its header only, never decoded here"""
+
+    default_error_messages = {
+        "invalid_image": "Upload a valid image. The file you uploaded was "
+        "either not an image or a corrupted image.",
+        "unsupported_format": "Unsupported image format {format}.",
+        "too_many_pixels": "Image is larger than {max_pixels} pixels.",
+    }
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        try:
+            # Image.open is lazy: it reads the header and stops
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+        except IMAGE_ERRORS:
+            self.fail("invalid_image")
+        finally:
+            file.seek(0)
+
+        if image_format not in settings.IMAGE_UPLOAD_FORMATS:
+            self.fail("unsupported_format", format=image_format)
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.fail(
+                "too_many_pixels", max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS
+            )
+        file.content_type = Image.MIME.get(
+            image_format, getattr(file, "content_type", None)
+        )
+        return file
+
+
+def load_verified(field):
+    """Fully verify and decode an uploaded image, or return ``None``"""
+    try:
+        with field.open("rb") as original:
+            with Image.open(original) as image:
+                image.verify()
+            original.seek(0)
+            image = Image.open(original)
+            if image.width * image.height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+                return None
+            image.load()
+    except IMAGE_ERRORS:
+        return None
+    return ImageOps.exif_transpose(image)
@@ -0,0 +1,157 @@
+"""JWT authentication that resolves users without a query per request.
+
+Users resolved from access tokens are kept in a small per-process LRU for
+``AUTH_USER_LOCAL_TTL`` seconds, backed by the shared cache for
+``AUTH_USER_CACHE_TTL`` seconds. ``User`` saves and deletes (which covers
+password changes and deactivation) invalidate both tiers of the process
+that made the change; other processes pick the change up once their short
+local entry expires.
+
+Users are loaded from the primary, as a lagging replica could still have
+them as they were before, e.g., a deactivation. Shared entries carry the
+per-user version current when the row was read. Invalidating bumps it,
+once at the write and again on commit, so a row read by a concurrent
+request before the commit is never served.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from social_media_api.db_router import using_primary
+
+
+class LocalUserCache:
+    """Thread-safe LRU of ``{user_id: (user, expires_at)}``"""
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (
+                user, time.monotonic() + settings.AUTH_USER_LOCAL_TTL
+            )
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.AUTH_USER_LOCAL_SIZE:
+                self._users.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+local_users = LocalUserCache()
+
+
+def shared_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def version_key(user_id):
+    return f"auth_user:version:{user_id}"
+
+
+def user_version(user_id):
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown or evicted: restart from a value never used before
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def cached_user(user_id):
+    user = local_users.get(user_id)
+    if user is None:
+        key, current = shared_key(user_id), version_key(user_id)
+        values = cache.get_many([key, current])
+        entry = values.get(key)
+        if entry is None or entry[0] != values.get(current):
+            return None
+        user = entry[1]
+        local_users.set(user_id, user)
+    return user
+
+
+def remember_user(user, version):
+    """Cache ``user`` as read while ``version`` was current"""
+    if user_version(user.pk) != version:
+        # Invalidated since it was read
+        return
+    local_users.set(user.pk, user)
+    cache.set(
+        shared_key(user.pk), (version, user), settings.AUTH_USER_CACHE_TTL
+    )
+
+
+def forget_user(user_id):
+    local_users.discard(user_id)
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.add(version_key(user_id), time.time_ns(), timeout=None)
+    cache.delete(shared_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = cached_user(user_id)
+        if user is None:
+            version = user_version(user_id)
+            # Not found and inactive users are rejected here, never cached
+            with using_primary():
+                user = super().get_user(validated_token)
+            remember_user(user, version)
+            return copy.copy(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+        # Requests may modify their user; keep the cached one pristine
+        return copy.copy(user)
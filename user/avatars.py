@@ -0,0 +1,105 @@
+"""Content-addressed, reference-counted avatar storage.
+
+Uploads are hashed chunk by chunk and stored once under their SHA-256
+(see ``avatar_image_file_path``). Users point at the shared file and every
+``AvatarBlob`` counts its users; blobs nobody references any more are
+deleted by ``sweep_orphaned_avatars``. Uploads are only header-checked in
+the request; ``verify_avatar`` fully decodes every new blob afterwards.
+"""
+
+import hashlib
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from social_media_api.uploads import load_verified
+from user.models import AvatarBlob
+
+logger = logging.getLogger(__name__)
+
+
+def digest(upload):
+    # StreamingUploadHandler already hashed the upload while receiving it
+    if getattr(upload, "sha256", None):
+        return upload.sha256
+    sha256 = hashlib.sha256()
+    for chunk in upload.chunks():
+        sha256.update(chunk)
+    upload.seek(0)
+    return sha256.hexdigest()
+
+
+def store(upload):
+    """Return the blob holding ``upload``, writing it only if it is new"""
+    with transaction.atomic():
+        blob, _ = AvatarBlob.objects.select_for_update().get_or_create(
+            sha256=digest(upload), defaults={"size": upload.size}
+        )
+        if not blob.file:
+            blob.file.save(upload.name, upload, save=False)
+            blob.save(update_fields=["file"])
+        AvatarBlob.objects.filter(pk=blob.pk).update(
+            ref_count=F("ref_count") + 1, updated_at=timezone.now()
+        )
+    return blob
+
+
+def release(name):
+    """Drop one reference to the blob stored at ``name``"""
+    if not name:
+        return
+    AvatarBlob.objects.filter(file=name, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def replace(user, upload):
+    """Point ``user.avatar`` at the blob for ``upload`` and save"""
+    previous = user.avatar.name
+    blob = store(upload)
+    user.avatar.name = blob.file.name
+    user.save()
+    if previous != blob.file.name:
+        release(previous)
+    else:
+        # Same content again: keep a single reference
+        release(blob.file.name)
+    return user
+
+
+def sweep(batch_size, grace):
+    """Delete up to ``batch_size`` blobs unreferenced for ``grace``"""
+    with transaction.atomic():
+        orphans = list(
+            AvatarBlob.objects.select_for_update(skip_locked=True)
+            .filter(ref_count=0, updated_at__lt=timezone.now() - grace)
+            .order_by("updated_at")[:batch_size]
+        )
+        AvatarBlob.objects.filter(
+            pk__in=[blob.pk for blob in orphans], ref_count=0
+        ).delete()
+    for blob in orphans:
+        blob.file.delete(save=False)
+    return len(orphans)
+
+
+def verify(blob_id):
+    """Fully verify a stored blob; remove it from its users if invalid"""
+    with transaction.atomic():
+        blob = (
+            AvatarBlob.objects.select_for_update().filter(pk=blob_id).first()
+        )
+        if blob is None or not blob.file:
+            return True
+        if load_verified(blob.file) is not None:
+            return True
+        logger.warning("Removing invalid avatar %s", blob.file.name)
+        for user in get_user_model().objects.filter(avatar=blob.file.name):
+            user.avatar = None
+            user.save(update_fields=["avatar"])
+        blob.delete()
+    blob.file.delete(save=False)
+    return False
@@ -0,0 +1,174 @@
+"""Bloom filter fast path for refresh token blacklist checks.
+
+Every process keeps a Bloom filter of the ``jti`` of blacklisted, not yet
+expired tokens. A miss proves a token is not blacklisted, so only filter
+hits query the blacklist tables. Tokens blacklisted in this process are
+added at once; other processes see a generation counter in the shared
+cache change and read the recently blacklisted rows. The filter is fully
+rebuilt every ``TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS`` to shed expired
+tokens, which ``purge_expired`` then deletes in batches.
+
+The generation counter has to be seen by every process, so the filter is
+only used with a shared cache (``TOKEN_BLACKLIST_BLOOM_ENABLED``, set with
+``REDIS_URL``); otherwise every check queries the blacklist.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+GENERATION_KEY = "token_blacklist:generation"
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(
+            1, round(self.size / capacity * math.log(2))
+        )
+        self.bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class BlacklistFilter:
+    """Process-wide Bloom filter of blacklisted ``jti`` values"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._bloom = None
+        self._built_at = 0.0
+        self._generation = None
+        self._last_id = 0
+
+    def _rebuild(self):
+        rows = list(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now()
+            ).values_list("id", "token__jti")
+        )
+        bloom = BloomFilter(
+            max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, 2 * len(rows)),
+            settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE,
+        )
+        for pk, jti in rows:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._built_at = time.monotonic()
+        self._last_id = max((pk for pk, jti in rows), default=self._last_id)
+
+    def _catch_up(self):
+        # Ids are allocated before commit, so rows may land out of order
+        since = self._last_id - settings.TOKEN_BLACKLIST_BLOOM_ID_OVERLAP
+        for pk, jti in BlacklistedToken.objects.filter(
+            id__gt=max(since, 0)
+        ).values_list("id", "token__jti"):
+            self._bloom.add(jti)
+            self._last_id = max(self._last_id, pk)
+
+    def _refresh(self):
+        generation = cache.get(GENERATION_KEY, 0)
+        age = time.monotonic() - self._built_at
+        if (
+            self._bloom is not None
+            and generation == self._generation
+            and age < settings.TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS
+        ):
+            return
+        with self._lock:
+            if (
+                self._bloom is None
+                or age >= settings.TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS
+            ):
+                self._rebuild()
+            elif generation != self._generation:
+                self._catch_up()
+            self._generation = generation
+
+    def might_contain(self, jti):
+        self._refresh()
+        return jti in self._bloom
+
+    def add(self, jti):
+        if self._bloom is not None:
+            self._bloom.add(jti)
+
+
+blacklisted = BlacklistFilter()
+
+
+def is_blacklisted(jti):
+    """Check the blacklist tables only when the filter cannot rule out"""
+    if settings.TOKEN_BLACKLIST_BLOOM_ENABLED and not (
+        blacklisted.might_contain(jti)
+    ):
+        return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def record(jti):
+    """Add a newly blacklisted ``jti`` here and notify other processes"""
+    blacklisted.add(jti)
+
+    def bump():
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+    transaction.on_commit(bump)
+
+
+class FilteredRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+def purge_expired(batch_size):
+    """Delete up to ``batch_size`` expired outstanding tokens"""
+    with transaction.atomic():
+        expired = list(
+            OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+            .order_by()
+            .values_list("id", flat=True)[:batch_size]
+        )
+        BlacklistedToken.objects.filter(token_id__in=expired).delete()
+        OutstandingToken.objects.filter(id__in=expired).delete()
+    return len(expired)
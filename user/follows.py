@@ -0,0 +1,171 @@
+"""Follow graph changes in bulk.
+
+``a.followers`` holds the users following ``a``, so an edge row of the
+auto-created through table has ``from_user`` = the followed user and
+``to_user`` = the follower. ``User.followers_count`` and
+``following_count`` are kept in step from ``m2m_changed``; writes that
+bypass it recount with ``reconcile_counts``.
+"""
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from social_media_api import response_cache
+from user.models import User
+
+Follow = User.followers.through
+
+
+def adjust_counts(user_ids, field, delta):
+    """Atomically add ``delta`` to a follow counter of ``user_ids``"""
+    users = User.objects.filter(id__in=user_ids)
+    if delta < 0:
+        users = users.filter(**{f"{field}__gte": -delta})
+    # update() skips auto_now, but the counts are part of the profile
+    users.update(**{field: F(field) + delta, "updated_at": timezone.now()})
+
+
+def _edge_count(field):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def reconcile_counts(user_ids):
+    """Recount follow counters of ``user_ids``; return drifted rows"""
+    return (
+        User.objects.filter(id__in=user_ids)
+        .alias(
+            actual_followers=_edge_count("from_user"),
+            actual_following=_edge_count("to_user"),
+        )
+        .filter(
+            ~Q(followers_count=F("actual_followers"))
+            | ~Q(following_count=F("actual_following"))
+        )
+        .update(
+            followers_count=_edge_count("from_user"),
+            following_count=_edge_count("to_user"),
+            updated_at=timezone.now(),
+        )
+    )
+
+
+def neighbour_ids(user, reverse):
+    """Ids across the follow edges of ``user`` on one side"""
+    if reverse:
+        return set(
+            Follow.objects.filter(to_user=user).values_list(
+                "from_user_id", flat=True
+            )
+        )
+    return set(
+        Follow.objects.filter(from_user=user).values_list(
+            "to_user_id", flat=True
+        )
+    )
+
+
+def resolve(user, user_ids):
+    """Split ``user_ids`` into followable ids and ones that are missing"""
+    requested = list(dict.fromkeys(user_ids))
+    existing = set(
+        User.objects.filter(id__in=requested)
+        .exclude(id=user.id)
+        .values_list("id", flat=True)
+    )
+    missing = [pk for pk in requested if pk not in existing]
+    return [pk for pk in requested if pk in existing], missing
+
+
+def following_ids(user, user_ids):
+    return set(
+        Follow.objects.filter(
+            to_user=user, from_user_id__in=user_ids
+        ).values_list("from_user_id", flat=True)
+    )
+
+
+def follow_many(user, user_ids):
+    """Follow every existing user of ``user_ids``.
+
+    ``following.add`` inserts the new edges with one
+    ``bulk_create(ignore_conflicts=True)`` and still sends ``m2m_changed``
+    for exactly those edges, so timelines and caches follow along.
+    """
+    found, missing = resolve(user, user_ids)
+    already = following_ids(user, found)
+    followed = [pk for pk in found if pk not in already]
+    if followed:
+        user.following.add(*followed)
+    return {
+        "followed": followed,
+        "unchanged": [pk for pk in found if pk in already],
+        "missing": missing,
+    }
+
+
+def unfollow_many(user, user_ids):
+    """Unfollow every user of ``user_ids`` with one delete"""
+    found, missing = resolve(user, user_ids)
+    following = following_ids(user, found)
+    unfollowed = [pk for pk in found if pk in following]
+    if unfollowed:
+        user.following.remove(*unfollowed)
+    return {
+        "unfollowed": unfollowed,
+        "unchanged": [pk for pk in found if pk not in following],
+        "missing": missing,
+    }
+
+
+def import_edges(edges):
+    """Insert ``(follower_id, followed_id)`` edges without signals.
+
+    Edges naming unknown users, self-follows and existing edges are
+    skipped. Return the edges that were created.
+    """
+    edges = {
+        (follower, followed)
+        for follower, followed in edges
+        if follower != followed
+    }
+    user_ids = {pk for edge in edges for pk in edge}
+    existing_users = set(
+        User.objects.filter(id__in=user_ids).values_list("id", flat=True)
+    )
+    edges = {
+        edge for edge in edges
+        if edge[0] in existing_users and edge[1] in existing_users
+    }
+    if not edges:
+        return []
+
+    followed_ids = {followed for _, followed in edges}
+    existing_edges = set(
+        Follow.objects.filter(from_user_id__in=followed_ids).filter(
+            to_user_id__in={follower for follower, _ in edges}
+        ).values_list("to_user_id", "from_user_id")
+    )
+    created = sorted(edges - existing_edges)
+    Follow.objects.bulk_create(
+        [
+            Follow(from_user_id=followed, to_user_id=follower)
+            for follower, followed in created
+        ],
+        ignore_conflicts=True,
+    )
+    reconcile_counts({pk for edge in created for pk in edge})
+    for followed in {followed for _, followed in created}:
+        response_cache.bump("user", followed)
+    for follower in {follower for follower, _ in created}:
+        response_cache.bump("feed", follower)
+    return created
@@ -0,0 +1,60 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.follows import import_edges
+
+
+def read_csv(file):
+    """Yield edges of a ``follower,followed`` CSV with a header row"""
+    for row in csv.DictReader(file):
+        yield int(row["follower"]), int(row["followed"])
+
+
+def read_jsonl(file):
+    """Yield edges of ``{"follower": id, "followed": id}`` lines"""
+    for line in file:
+        if line.strip():
+            row = json.loads(line)
+            yield int(row["follower"]), int(row["followed"])
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class Command(BaseCommand):
+    help = "Import follow edges from a CSV or JSONL file in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=READERS)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError("Use --format csv or --format jsonl")
+
+        read = 0
+        created = 0
+        with open(path, newline="", encoding="utf-8") as file:
+            edges = READERS[file_format](file)
+            try:
+                while chunk := list(islice(edges, options["chunk_size"])):
+                    read += len(chunk)
+                    created += len(import_edges(chunk))
+            except (KeyError, TypeError, ValueError) as error:
+                raise CommandError(
+                    f"Malformed edge after {read} edges: {error!r}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} of {read} follow edges "
+                "(timelines are not backfilled for imported edges)"
+            )
+        )
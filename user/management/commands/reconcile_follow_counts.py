@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from user import follows
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = "Recount followers_count and following_count of users in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        fixed = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            fixed += follows.reconcile_counts(user_ids)
+            last_id = user_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled follow counts of {fixed} users")
+        )
@@ -0,0 +1,65 @@
+# Generated by Django 5.1 on 2026-10-18 04:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+CREATE_TRIGRAM_INDEXES = """
+CREATE INDEX user_email_trgm_idx
+    ON user_user USING gin (email gin_trgm_ops);
+CREATE INDEX user_bio_trgm_idx
+    ON user_user USING gin (bio gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS user_email_trgm_idx;
+DROP INDEX IF EXISTS user_bio_trgm_idx;
+"""
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_TRIGRAM_INDEXES)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_TRIGRAM_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("user", "0002_remove_user_username"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # pg_trgm indexes only exist on PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="user",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["email"],
+                        name="user_email_trgm_idx",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="user",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["bio"],
+                        name="user_bio_trgm_idx",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(
+                    create_trigram_indexes, drop_trigram_indexes
+                ),
+            ],
+        ),
+    ]
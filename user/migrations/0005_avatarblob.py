@@ -0,0 +1,49 @@
+# Generated by Django 5.1 on 2026-10-18 04:51
+
+import django.utils.timezone
+import user.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_user_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvatarBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                (
+                    "file",
+                    models.ImageField(
+                        db_index=True,
+                        max_length=255,
+                        upload_to=user.models.avatar_image_file_path,
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["ref_count", "updated_at"],
+                        name="avatar_blob_orphan_idx",
+                    )
+                ],
+            },
+        ),
+    ]
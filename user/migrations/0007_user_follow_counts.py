@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-18 05:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Follow = User.followers.through
+
+    def edge_count(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+
+    User.objects.update(
+        followers_count=edge_count("from_user"),
+        following_count=edge_count("to_user"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0006_followsuggestion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
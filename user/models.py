@@ -1,12 +1,12 @@
 import os
-import uuid
 
 from django.contrib.auth.models import (
     AbstractUser,
     BaseUserManager,
 )
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.utils.text import slugify
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 
@@ -51,6 +51,10 @@ class User(AbstractUser):
     followers = models.ManyToManyField(
         "self", symmetrical=False, related_name="following"
     )
+    # Maintained from m2m_changed on the follow edges (see user.follows)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     username = None
 
     USERNAME_FIELD = "email"
@@ -58,12 +62,85 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(
+                fields=["email"],
+                opclasses=["gin_trgm_ops"],
+                name="user_email_trgm_idx",
+            ),
+            GinIndex(
+                fields=["bio"],
+                opclasses=["gin_trgm_ops"],
+                name="user_bio_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
 
 def avatar_image_file_path(instance, filename):
+    """Content-addressed path of an ``AvatarBlob``: avatars/ab/cd/<sha256>"""
     _, extension = os.path.splitext(filename)
-    filename = f"{slugify(instance.title)}-{uuid.uuid4()}{extension}"
+    digest = instance.sha256
+    return os.path.join(
+        "avatars", digest[:2], digest[2:4], f"{digest}{extension.lower()}"
+    )
+
+
+class AvatarBlob(models.Model):
+    """Avatar file stored once per distinct content and shared by users"""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.ImageField(
+        upload_to=avatar_image_file_path, max_length=255, db_index=True
+    )
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["ref_count", "updated_at"],
+                name="avatar_blob_orphan_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
 
-    return os.path.join("uploads/avatars/", filename)
+class FollowSuggestion(models.Model):
+    """Precomputed "who to follow" candidate of a user"""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions"
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "suggested"], name="unique_follow_suggestion"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score", "-id"],
+                name="follow_suggestion_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.suggested_id} ({self.score:.2f})"
@@ -0,0 +1,58 @@
+"""Similarity-ranked user search over ``email`` and ``bio``.
+
+On PostgreSQL the substring match is an ``ILIKE`` and the similarity test
+the ``%`` operator; the ``gin_trgm_ops`` indexes serve both (``icontains``
+would compare ``UPPER()`` values, which they cannot). Results are ordered
+by the best trigram similarity of either column. Other databases fall back
+to a plain ``icontains`` filter.
+"""
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Lookup, Q
+from django.db.models.functions import Greatest
+
+
+class ILikeContains(Lookup):
+    """``column ILIKE '%text%'``, served by trigram indexes"""
+
+    lookup_name = "ilike_contains"
+
+    def process_rhs(self, compiler, connection):
+        rhs, params = super().process_rhs(compiler, connection)
+        return rhs, [
+            f"%{connection.ops.prep_for_like_query(param)}%"
+            for param in params
+        ]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", [*lhs_params, *rhs_params]
+
+
+def search_users(queryset, text):
+    """Filter ``queryset`` by ``text``, most similar users first"""
+    text = text.strip()
+    if not text:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(
+            Q(email__icontains=text) | Q(bio__icontains=text)
+        )
+
+    return (
+        queryset.filter(
+            Q(ILikeContains(F("email"), text))
+            | Q(ILikeContains(F("bio"), text))
+            | Q(email__trigram_similar=text)
+            | Q(bio__trigram_similar=text)
+        )
+        .annotate(
+            similarity=Greatest(
+                TrigramSimilarity("email", text),
+                TrigramSimilarity("bio", text),
+            )
+        )
+        .order_by("-similarity", "-id")
+    )
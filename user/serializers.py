@@ -1,18 +1,37 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
 
+from social_media_api.fieldsets import SparseFieldsMixin
+from social_media_api.uploads import HeaderValidatedImageField
+from user import avatars, blacklist
+from user.models import FollowSuggestion
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
         required=True,
         min_length=5
     )
-    avatar = serializers.ImageField(required=False)
+    avatar = HeaderValidatedImageField(required=False)
 
     class Meta:
         model = get_user_model()
-        fields = ("email", "bio", "avatar", "followers", "password")
+        fields = (
+            "email",
+            "bio",
+            "avatar",
+            "followers",
+            "followers_count",
+            "following_count",
+            "password",
+        )
+        read_only_fields = ("followers_count", "following_count")
         extra_kwargs = {
             "followers": {"required": False},
         }
@@ -21,33 +40,88 @@ class UserSerializer(serializers.ModelSerializer):
         """Create a new user with encrypted password and return it"""
         password = validated_data.pop("password", None)
         followers = validated_data.pop("followers", None)
+        avatar = validated_data.pop("avatar", None)
         user = get_user_model().objects.create_user(**validated_data)
         if password:
             user.set_password(password)
             user.save()
         if followers is not None:
             user.followers.set(followers)
+        if avatar is not None:
+            avatars.replace(user, avatar)
         return user
 
     def update(self, instance, validated_data):
         """Update a user, set the password correctly and return it"""
         password = validated_data.pop("password", None)
+        avatar = validated_data.pop("avatar", None)
         user = super().update(instance, validated_data)
         if password:
             user.set_password(password)
             user.save()
+        if avatar is not None:
+            avatars.replace(user, avatar)
 
         return user
 
 
 class ImageUploadSerializer(serializers.ModelSerializer):
-    avatar = serializers.ImageField()
+    avatar = HeaderValidatedImageField()
 
     class Meta:
         model = get_user_model()
         fields = ("avatar",)
 
     def update(self, instance, validated_data):
-        instance.avatar = validated_data.get("avatar", instance.avatar)
-        instance.save()
+        avatar = validated_data.get("avatar")
+        if avatar is not None:
+            avatars.replace(instance, avatar)
         return instance
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Lightweight user projection without the follow graph"""
+
+    class Meta:
+        model = get_user_model()
+        fields = ("id", "email", "bio", "avatar")
+        read_only_fields = fields
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=("follow", "unfollow"))
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+
+    def validate_user_ids(self, value):
+        if len(value) > settings.FOLLOW_BULK_MAX_USERS:
+            raise serializers.ValidationError(
+                "Ensure this field has no more than "
+                f"{settings.FOLLOW_BULK_MAX_USERS} elements."
+            )
+        return value
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="suggested.id")
+    email = serializers.EmailField(source="suggested.email")
+    bio = serializers.CharField(source="suggested.bio")
+    avatar = serializers.ImageField(source="suggested.avatar")
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ("id", "email", "bio", "avatar", "mutual_count", "score")
+        read_only_fields = fields
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = blacklist.FilteredRefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if blacklist.is_blacklisted(token.get(api_settings.JTI_CLAIM)):
+            raise serializers.ValidationError(_("Token is blacklisted"))
+        return {}
@@ -0,0 +1,103 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from social_media_api import response_cache
+from user import avatars, blacklist, follows
+from user.authentication import forget_user
+from user.models import AvatarBlob, User
+from user.tasks import verify_avatar
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile(sender, instance, **kwargs):
+    response_cache.bump("user", instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Drop the cached user, e.g. after a password change or deactivation"""
+    forget_user(instance.pk)
+    # Requests may cache the old row again until the change is committed
+    transaction.on_commit(partial(forget_user, instance.pk))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def record_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        blacklist.record(instance.token.jti)
+
+
+@receiver(m2m_changed, sender=follows.Follow)
+def invalidate_follow_profiles(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Profiles list followers and follow counts, so refresh both sides"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    for pk in {instance.pk, *(pk_set or ())}:
+        response_cache.bump("user", pk)
+
+
+@receiver(m2m_changed, sender=follows.Follow)
+def count_follows(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep followers_count and following_count in step with the edges"""
+    # ``user.following`` is the reverse side: instance is the follower
+    own, others = (
+        ("following_count", "followers_count")
+        if reverse
+        else ("followers_count", "following_count")
+    )
+    if action == "post_add" and pk_set:
+        # pk_set only holds the edges that were actually inserted
+        follows.adjust_counts([instance.pk], own, len(pk_set))
+        follows.adjust_counts(pk_set, others, 1)
+    elif action == "post_remove" and pk_set:
+        # pk_set holds every requested id, removed or not: recount
+        follows.reconcile_counts({instance.pk, *pk_set})
+    elif action == "pre_clear":
+        instance._cleared_follow_ids = follows.neighbour_ids(
+            instance, reverse
+        )
+    elif action == "post_clear":
+        cleared = getattr(instance, "_cleared_follow_ids", set())
+        follows.reconcile_counts({instance.pk, *cleared})
+
+
+@receiver(pre_delete, sender=User)
+def remember_follow_neighbours(sender, instance, **kwargs):
+    """Edges of a deleted user cascade without m2m_changed"""
+    instance._follow_neighbour_ids = follows.neighbour_ids(
+        instance, reverse=True
+    ) | follows.neighbour_ids(instance, reverse=False)
+
+
+@receiver(post_delete, sender=User)
+def recount_follow_neighbours(sender, instance, **kwargs):
+    neighbours = getattr(instance, "_follow_neighbour_ids", set())
+    if neighbours:
+        follows.reconcile_counts(neighbours)
+        for pk in neighbours:
+            response_cache.bump("user", pk)
+
+
+@receiver(post_delete, sender=User)
+def release_avatar(sender, instance, **kwargs):
+    avatars.release(instance.avatar.name)
+
+
+@receiver(post_save, sender=AvatarBlob)
+def verify_stored_avatar(sender, instance, update_fields, **kwargs):
+    # avatars.store saves ``file`` alone once it wrote a new blob
+    if update_fields and "file" in update_fields:
+        transaction.on_commit(partial(verify_avatar.delay, instance.pk))
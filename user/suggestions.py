@@ -0,0 +1,106 @@
+"""Batch "who to follow" suggestions.
+
+The follow graph is streamed once from the edge table into a sparse
+adjacency list, one compact integer array of followed ids per user.
+Friends-of-friends overlap of a user is their row of ``A @ A``. It is
+accumulated in a sparse counter, so memory grows with the number of
+edges, not with the square of the number of users. Candidates are
+ranked by overlap plus a log-damped follower count. The top rows are
+stored in ``FollowSuggestion`` and the API only ever reads those.
+"""
+
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from user.models import FollowSuggestion, User
+
+Follow = User.followers.through
+
+
+def load_graph():
+    """Return ``({follower: followed ids}, Counter of follower totals)``"""
+    following = defaultdict(lambda: array("q"))
+    follower_counts = Counter()
+    edges = Follow.objects.order_by().values_list("to_user_id", "from_user_id")
+    for follower, followed in edges.iterator(
+        chunk_size=settings.FOLLOW_SUGGESTION_BATCH_SIZE
+    ):
+        following[follower].append(followed)
+        follower_counts[followed] += 1
+    return following, follower_counts
+
+
+def rank(user_id, following, follower_counts):
+    """Return the best ``(score, mutual_count, candidate_id)`` of a user"""
+    followed = following.get(user_id, ())
+    excluded = set(followed)
+    excluded.add(user_id)
+
+    mutual = Counter()
+    for friend in followed:
+        friends_of_friend = following.get(friend, ())
+        # Accounts following huge numbers of users say little about taste
+        if len(friends_of_friend) <= settings.FOLLOW_SUGGESTION_HUB_LIMIT:
+            mutual.update(friends_of_friend)
+
+    weight = settings.FOLLOW_SUGGESTION_POPULARITY_WEIGHT
+    scored = []
+    for candidate, count in mutual.items():
+        if candidate not in excluded:
+            popularity = weight * math.log1p(follower_counts[candidate])
+            scored.append((count + popularity, count, candidate))
+    return heapq.nlargest(settings.FOLLOW_SUGGESTION_SIZE, scored)
+
+
+def compute():
+    """Recompute and store suggestions of every user; return row count"""
+    computed_at = timezone.now()
+    following, follower_counts = load_graph()
+    user_ids = list(following)
+    batch_size = settings.FOLLOW_SUGGESTION_BATCH_SIZE
+
+    stored = 0
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        ranked = {
+            user_id: rank(user_id, following, follower_counts)
+            for user_id in chunk
+        }
+        # Users deleted since the graph was read are left out
+        referenced = set(chunk).union(
+            candidate
+            for rows in ranked.values()
+            for _, _, candidate in rows
+        )
+        alive = set(
+            User.objects.filter(id__in=referenced).values_list(
+                "id", flat=True
+            )
+        )
+        suggestions = [
+            FollowSuggestion(
+                user_id=user_id,
+                suggested_id=candidate,
+                score=score,
+                mutual_count=mutual_count,
+                computed_at=computed_at,
+            )
+            for user_id, rows in ranked.items()
+            if user_id in alive
+            for score, mutual_count, candidate in rows
+            if candidate in alive
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=chunk).delete()
+            FollowSuggestion.objects.bulk_create(suggestions)
+        stored += len(suggestions)
+
+    # Users who stopped following anyone keep no stale suggestions
+    FollowSuggestion.objects.filter(computed_at__lt=computed_at).delete()
+    return stored
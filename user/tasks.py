@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+
+from user import avatars, blacklist, suggestions
+
+
+@shared_task
+def sweep_orphaned_avatars():
+    """Delete avatar files no user references any more, in batches"""
+    grace = timedelta(seconds=settings.AVATAR_ORPHAN_GRACE_SECONDS)
+    deleted = 0
+    while True:
+        swept = avatars.sweep(settings.AVATAR_SWEEP_BATCH_SIZE, grace)
+        deleted += swept
+        if swept < settings.AVATAR_SWEEP_BATCH_SIZE:
+            break
+    return f"{deleted} orphaned avatars deleted"
+
+
+@shared_task
+def verify_avatar(blob_id):
+    """Fully decode a newly stored avatar and drop it if it is invalid"""
+    if avatars.verify(blob_id):
+        return "Avatar verified"
+    return "Invalid avatar removed"
+
+
+@shared_task
+def compute_follow_suggestions():
+    """Rebuild the "who to follow" suggestions from the follow graph"""
+    stored = suggestions.compute()
+    return f"{stored} follow suggestions stored"
+
+
+@shared_task
+def purge_expired_tokens():
+    """Delete expired outstanding and blacklisted tokens in batches"""
+    deleted = 0
+    while True:
+        purged = blacklist.purge_expired(
+            settings.TOKEN_BLACKLIST_PURGE_BATCH_SIZE
+        )
+        deleted += purged
+        if purged < settings.TOKEN_BLACKLIST_PURGE_BATCH_SIZE:
+            break
+    return f"{deleted} expired tokens purged"
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import (
+    cached_user,
+    local_users,
+    remember_user,
+    user_version,
+)
+
+ME_URL = reverse("user:manage")
+FOLLOWERS_URL = reverse("user:list-followers")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Test authenticated users are served from the auth cache"""
+
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def count_queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(FOLLOWERS_URL)
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def auth_queries(self):
+        """Queries of a request beyond those of the view itself"""
+        forced = APIClient()
+        forced.force_authenticate(user=self.user)
+        return self.count_queries(self.client) - self.count_queries(
+            forced
+        )
+
+    def test_steady_state_makes_no_auth_queries(self):
+        """Test only the first request reads the user row"""
+        self.assertEqual(self.auth_queries(), 1)
+        self.assertEqual(self.auth_queries(), 0)
+
+    def test_shared_cache_backs_local_cache(self):
+        """Test a cold process is filled from the shared cache"""
+        self.auth_queries()
+        local_users.clear()
+
+        self.assertEqual(self.auth_queries(), 0)
+
+    def test_save_invalidates_cached_user(self):
+        """Test profile changes are visible to the next request"""
+        self.auth_queries()
+        self.user.bio = "renamed"
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["bio"], "renamed")
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user revokes their cached authentication"""
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(FOLLOWERS_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_password_change_invalidates_cached_user(self):
+        """Test a password change reloads the user from the database"""
+        self.auth_queries()
+        self.user.set_password("newpass")
+        self.user.save()
+
+        self.assertEqual(self.auth_queries(), 1)
+
+    def test_row_read_before_commit_not_cached(self):
+        """Test a row read before a change commits is never served"""
+        version = user_version(self.user.pk)
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # A concurrent request caching the row it read before commit
+            remember_user(stale, user_version(self.user.pk))
+
+        self.assertIsNone(cached_user(self.user.pk))
+
+        remember_user(stale, version)
+        self.assertIsNone(cached_user(self.user.pk))
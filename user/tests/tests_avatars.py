@@ -0,0 +1,102 @@
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from user.models import AvatarBlob
+from user.serializers import ImageUploadSerializer
+from user.tasks import sweep_orphaned_avatars, verify_avatar
+
+
+def sample_avatar(color="red"):
+    image = Image.new("RGB", (64, 64), color)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return SimpleUploadedFile(
+        "avatar.png", buffer.getvalue(), content_type="image/png"
+    )
+
+
+def upload_avatar(user, avatar):
+    serializer = ImageUploadSerializer(user, data={"avatar": avatar})
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AvatarStorageTests(TestCase):
+    """Test content-addressed avatar storage"""
+
+    def setUp(self):
+        self.first = get_user_model().objects.create_user(
+            email="first@example.com", password="testpass123"
+        )
+        self.second = get_user_model().objects.create_user(
+            email="second@example.com", password="testpass123"
+        )
+
+    def test_same_content_stored_once(self):
+        """Test identical uploads share one file"""
+        upload_avatar(self.first, sample_avatar())
+        upload_avatar(self.second, sample_avatar())
+
+        blob = AvatarBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(self.first.avatar.name, self.second.avatar.name)
+        self.assertIn(blob.sha256, self.first.avatar.name)
+
+    def test_reupload_keeps_single_reference(self):
+        """Test uploading the same avatar again does not leak a reference"""
+        upload_avatar(self.first, sample_avatar())
+        upload_avatar(self.first, sample_avatar())
+
+        self.assertEqual(AvatarBlob.objects.get().ref_count, 1)
+
+    @override_settings(AVATAR_ORPHAN_GRACE_SECONDS=0)
+    def test_replaced_avatar_swept(self):
+        """Test unreferenced blobs and their files are deleted"""
+        upload_avatar(self.first, sample_avatar("red"))
+        old = AvatarBlob.objects.get()
+        upload_avatar(self.first, sample_avatar("blue"))
+        AvatarBlob.objects.filter(pk=old.pk).update(
+            updated_at=old.updated_at - timedelta(seconds=1)
+        )
+
+        sweep_orphaned_avatars()
+
+        self.assertFalse(AvatarBlob.objects.filter(pk=old.pk).exists())
+        self.assertFalse(old.file.storage.exists(old.file.name))
+        self.assertEqual(AvatarBlob.objects.get().ref_count, 1)
+
+    def test_corrupt_avatar_removed_by_task(self):
+        """Test a new avatar failing full verification is dropped"""
+        header = sample_avatar().read()[:60]
+        with mock.patch("user.signals.verify_avatar") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                upload_avatar(
+                    self.first, SimpleUploadedFile("avatar.png", header)
+                )
+        blob = AvatarBlob.objects.get()
+        task.delay.assert_called_once_with(blob.pk)
+
+        verify_avatar(blob.pk)
+
+        self.first.refresh_from_db()
+        self.assertFalse(self.first.avatar)
+        self.assertFalse(AvatarBlob.objects.exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+    def test_valid_avatar_kept_by_task(self):
+        """Test a valid avatar passes full verification"""
+        upload_avatar(self.first, sample_avatar())
+        blob = AvatarBlob.objects.get()
+
+        verify_avatar(blob.pk)
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.avatar.name, blob.file.name)
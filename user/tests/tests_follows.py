@@ -0,0 +1,181 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from user import follows
+
+BULK_URL = reverse("user:follow-bulk")
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email, password="testpass"
+    )
+
+
+class BulkFollowTests(TestCase):
+    """Test following and unfollowing many users at once"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user("testuser@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.others = [create_user(f"user{i}@example.com") for i in range(3)]
+
+    def test_bulk_follow_reports_missing(self):
+        """Test existing users are followed and unknown ids reported"""
+        self.user.following.add(self.others[0])
+        ids = [other.id for other in self.others]
+
+        res = self.client.post(
+            BULK_URL,
+            {"action": "follow", "user_ids": ids + [999, self.user.id]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["followed"], ids[1:])
+        self.assertEqual(res.data["unchanged"], ids[:1])
+        self.assertEqual(res.data["missing"], [999, self.user.id])
+        self.assertEqual(
+            set(self.user.following.values_list("id", flat=True)), set(ids)
+        )
+
+    def test_bulk_unfollow(self):
+        """Test many users are unfollowed with one request"""
+        self.user.following.add(*self.others[:2])
+
+        res = self.client.post(
+            BULK_URL,
+            {
+                "action": "unfollow",
+                "user_ids": [other.id for other in self.others],
+            },
+            format="json",
+        )
+
+        self.assertEqual(
+            res.data["unfollowed"], [other.id for other in self.others[:2]]
+        )
+        self.assertEqual(res.data["unchanged"], [self.others[2].id])
+        self.assertFalse(self.user.following.exists())
+
+
+class ImportFollowsTests(TestCase):
+    """Test the follow edge import command"""
+
+    def setUp(self):
+        self.users = [create_user(f"user{i}@example.com") for i in range(3)]
+
+    def import_file(self, suffix, content):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False
+        ) as file:
+            file.write(content)
+        call_command(
+            "import_follows", file.name, chunk_size=2, stdout=StringIO()
+        )
+
+    def test_import_csv(self):
+        """Test CSV edges are imported, skipping unknown and self edges"""
+        a, b, c = (user.id for user in self.users)
+        self.import_file(
+            ".csv",
+            "follower,followed\n"
+            f"{a},{b}\n{a},{c}\n{b},{c}\n{a},{a}\n{a},999\n{a},{b}\n",
+        )
+
+        self.assertEqual(
+            set(self.users[0].following.values_list("id", flat=True)),
+            {b, c},
+        )
+        self.assertEqual(self.users[2].followers.count(), 2)
+
+    def test_import_jsonl(self):
+        """Test JSONL edges are imported"""
+        a, b, _ = (user.id for user in self.users)
+        self.import_file(".jsonl", f'{{"follower": {b}, "followed": {a}}}\n')
+
+        self.assertEqual(
+            list(self.users[0].followers.values_list("id", flat=True)), [b]
+        )
+
+
+class FollowCountTests(TestCase):
+    """Test the denormalized follow counters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user("testuser@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.others = [create_user(f"user{i}@example.com") for i in range(3)]
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_counts_follow_and_unfollow(self):
+        """Test counters change only for edges that really changed"""
+        a, b, c = self.others
+        self.user.following.add(a, b)
+        self.user.following.add(a)
+        c.followers.add(self.user)
+        self.assertEqual(self.counts(self.user), (0, 3))
+        self.assertEqual(self.counts(a), (1, 0))
+
+        self.user.following.remove(a, self.user)
+        self.user.following.remove(a)
+        self.assertEqual(self.counts(self.user), (0, 2))
+        self.assertEqual(self.counts(a), (0, 0))
+
+        self.user.following.clear()
+        self.assertEqual(self.counts(self.user), (0, 0))
+        self.assertEqual(self.counts(c), (0, 0))
+
+    def test_deleted_user_releases_counts(self):
+        """Test deleting a user updates the other side of its edges"""
+        a, b, _ = self.others
+        self.user.following.add(a)
+        b.following.add(self.user)
+
+        self.user.delete()
+
+        self.assertEqual(self.counts(a), (0, 0))
+        self.assertEqual(self.counts(b), (0, 0))
+
+    def test_counts_on_profile(self):
+        """Test profiles return the counters"""
+        self.user.following.add(*self.others)
+        self.user.refresh_from_db()
+
+        res = self.client.get(reverse("user:manage"))
+
+        self.assertEqual(res.data["followers_count"], 0)
+        self.assertEqual(res.data["following_count"], 3)
+
+    def test_follow_list_is_compact(self):
+        """Test follow lists use one query and the summary projection"""
+        self.user.following.add(*self.others)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("user:list-following"))
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(
+            set(res.data["results"][0]), {"id", "email", "bio", "avatar"}
+        )
+
+    def test_import_and_reconcile_counts(self):
+        """Test imported edges are counted"""
+        a, b, _ = self.others
+        follows.import_edges([(a.id, b.id)])
+        self.assertEqual(self.counts(b), (1, 0))
+
+        get_user_model().objects.filter(id=b.id).update(followers_count=7)
+        call_command("reconcile_follow_counts", stdout=StringIO())
+        self.assertEqual(self.counts(b), (1, 0))
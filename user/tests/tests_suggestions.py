@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from user import suggestions
+from user.models import FollowSuggestion
+
+SUGGESTIONS_URL = reverse("user:follow-suggestions")
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email, password="testpass"
+    )
+
+
+class FollowSuggestionTests(TestCase):
+    """Test the precomputed friends-of-friends suggestions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user("me@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.a, self.b, self.c, self.d = (
+            create_user(f"{name}@example.com") for name in "abcd"
+        )
+        self.user.following.add(self.a, self.b)
+        self.a.following.add(self.c, self.d, self.user)
+        self.b.following.add(self.c)
+
+    def test_compute_ranks_by_overlap(self):
+        """Test candidates followed by more friends rank first"""
+        suggestions.compute()
+
+        rows = FollowSuggestion.objects.filter(user=self.user).order_by(
+            "-score"
+        )
+        self.assertEqual(
+            [(row.suggested, row.mutual_count) for row in rows],
+            [(self.c, 2), (self.d, 1)],
+        )
+
+    def test_endpoint_reads_precomputed_rows(self):
+        """Test the endpoint serves stored rows without recomputing"""
+        suggestions.compute()
+        self.user.following.add(self.c)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SUGGESTIONS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [row["id"] for row in res.data["results"]], [self.d.id]
+        )
+
+    def test_recompute_drops_stale_rows(self):
+        """Test suggestions of users who follow nobody are cleared"""
+        suggestions.compute()
+        self.user.following.clear()
+
+        suggestions.compute()
+
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.user).exists()
+        )
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social_media_api import throttling
+
+SEARCH_URL = reverse("user:user-search")
+
+
+class SlidingWindowCounterTests(TestCase):
+    """Test the approximate sliding-window counter"""
+
+    def setUp(self):
+        cache.clear()
+        self.counter = throttling.CacheWindowCounter()
+
+    def hit_at(self, now):
+        with mock.patch.object(throttling.time, "time", return_value=now):
+            return self.counter.hit("key", 10, 60)
+
+    def test_previous_window_decays(self):
+        """Test the previous window counts by its remaining overlap"""
+        for _ in range(10):
+            self.assertTrue(self.hit_at(600)[0])
+        self.assertFalse(self.hit_at(659)[0])
+
+        # A quarter into the next window 7.5 of the 10 still count
+        for _ in range(3):
+            self.assertTrue(self.hit_at(675)[0])
+        self.assertFalse(self.hit_at(675)[0])
+
+    def test_retry_after(self):
+        """Test the wait covers the decay of the previous window"""
+        self.assertEqual(throttling.retry_after(10, 60, 10, 5, 675), 15)
+        self.assertEqual(throttling.retry_after(10, 60, 0, 10, 675), 45)
+
+
+@mock.patch.object(
+    throttling.SlidingScopedRateThrottle,
+    "THROTTLE_RATES",
+    {"search": "2/min", "schedule": "1/hour"},
+)
+class ScopedThrottleTests(TestCase):
+    """Test per-scope rates of expensive endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_search_throttled_per_user(self):
+        """Test search is limited by its own rate, per user"""
+        for _ in range(2):
+            res = self.client.get(SEARCH_URL, {"search": "bio"})
+            self.assertEqual(res.status_code, 200)
+
+        res = self.client.get(SEARCH_URL, {"search": "bio"})
+        self.assertEqual(res.status_code, 429)
+        self.assertIn("Retry-After", res)
+
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=other)
+        res = self.client.get(SEARCH_URL, {"search": "bio"})
+        self.assertEqual(res.status_code, 200)
+
+    def test_post_search_throttled(self):
+        """Test post searches share the search rate, plain lists do not"""
+        url = reverse("media_api:post-list")
+        self.assertEqual(self.client.get(url, {"q": "news"}).status_code, 200)
+        self.assertEqual(
+            self.client.get(url, {"search": "news"}).status_code, 200
+        )
+        self.assertEqual(self.client.get(url, {"q": "news"}).status_code, 429)
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_other_endpoints_unaffected(self):
+        """Test views without a scope only count against the user rate"""
+        for _ in range(3):
+            res = self.client.get(reverse("user:list-following"))
+            self.assertEqual(res.status_code, 200)
+
+    def test_schedule_post_throttled(self):
+        """Test scheduling posts has its own rate, unlike other actions"""
+        url = reverse("media_api:post-schedule-post")
+        payload = {
+            "content": "Later",
+            "scheduled_time": (
+                timezone.now() + timedelta(days=1)
+            ).isoformat(),
+        }
+        self.assertEqual(self.client.post(url, payload).status_code, 202)
+        self.assertEqual(self.client.post(url, payload).status_code, 429)
+
+        res = self.client.get(reverse("media_api:post-list"))
+        self.assertEqual(res.status_code, 200)
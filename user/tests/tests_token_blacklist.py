@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user import blacklist
+from user.tasks import purge_expired_tokens
+
+REFRESH_URL = reverse("user:token_refresh")
+VERIFY_URL = reverse("user:token_verify")
+LOGOUT_URL = reverse("user:logout")
+
+
+class BloomFilterTests(TestCase):
+    """Test the Bloom filter itself"""
+
+    def test_no_false_negatives(self):
+        """Test every added value is reported as present"""
+        bloom = blacklist.BloomFilter(1000, 0.01)
+        values = [f"jti-{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+@override_settings(TOKEN_BLACKLIST_BLOOM_ENABLED=True)
+class TokenBlacklistTests(TestCase):
+    """Test blacklist checks of refresh and verify"""
+
+    def setUp(self):
+        cache.clear()
+        blacklist.blacklisted.reset()
+        self.user = get_user_model().objects.create_user(
+            email="testuser@example.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def blacklist_queries(self, url, payload):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, payload)
+        return res, [
+            query for query in queries.captured_queries
+            if "token_blacklist_blacklistedtoken" in query["sql"]
+        ]
+
+    def test_valid_tokens_skip_blacklist_queries(self):
+        """Test refresh and verify of valid tokens stay off the blacklist"""
+        self.client.post(REFRESH_URL, {"refresh": self.refresh})
+
+        res, queries = self.blacklist_queries(
+            REFRESH_URL, {"refresh": self.refresh}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(queries, [])
+
+        res, queries = self.blacklist_queries(
+            VERIFY_URL, {"token": self.refresh}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_logged_out_token_rejected(self):
+        """Test a blacklisted refresh token can neither refresh nor verify"""
+        self.client.post(REFRESH_URL, {"refresh": self.refresh})
+        res = self.client.post(LOGOUT_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, 205)
+
+        res, queries = self.blacklist_queries(
+            REFRESH_URL, {"refresh": self.refresh}
+        )
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(len(queries), 1)
+        res = self.client.post(VERIFY_URL, {"token": self.refresh})
+        self.assertEqual(res.status_code, 400)
+
+    def test_other_process_blacklisting_seen(self):
+        """Test a generation bump makes the filter read new blacklist rows"""
+        self.client.post(REFRESH_URL, {"refresh": self.refresh})
+        token = RefreshToken(self.refresh)
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=outstanding)]
+        )
+        cache.set(blacklist.GENERATION_KEY, 1, None)
+
+        res = self.client.post(REFRESH_URL, {"refresh": self.refresh})
+
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(TOKEN_BLACKLIST_BLOOM_ENABLED=False)
+    def test_unshared_cache_checks_database(self):
+        """Test blacklistings are seen at once without a shared cache"""
+        self.client.post(REFRESH_URL, {"refresh": self.refresh})
+        token = RefreshToken(self.refresh)
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        # Blacklisted by another process, whose generation bump is unseen
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=outstanding)]
+        )
+
+        res = self.client.post(REFRESH_URL, {"refresh": self.refresh})
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_purge_expired_tokens(self):
+        """Test expired tokens are purged and live ones kept"""
+        RefreshToken(self.refresh).blacklist()
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        with self.settings(TOKEN_BLACKLIST_PURGE_BATCH_SIZE=1):
+            purge_expired_tokens()
+
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertFalse(
+            OutstandingToken.objects.filter(jti=expired["jti"]).exists()
+        )
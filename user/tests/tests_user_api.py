@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 
 from django.contrib.auth import get_user_model
@@ -6,6 +7,8 @@ from rest_framework.test import APIClient
 
 from rest_framework.reverse import reverse
 
+from social_media_api import response_cache
+
 USER_URL = reverse("user:create")
 
 
@@ -54,6 +57,42 @@ class UserSerializerTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["email"], user.email)
 
+    def test_profile_cache_invalidated_on_follow(self):
+        """Test cached profile reflects new followers"""
+        user = create_user(email="testuser@example.com", password="testpass123")
+        follower = create_user(email="follower@example.com", password="pass123")
+        self.client.force_authenticate(user=user)
+        self.client.get(reverse("user:manage"))
+
+        follower.following.add(user)
+        res = self.client.get(reverse("user:manage"))
+
+        self.assertEqual(res.data["followers"], [follower.id])
+
+    def test_profile_cache_keyed_per_user(self):
+        """Test users with equal version counters never share a response"""
+        first = create_user(email="first@example.com", password="testpass123")
+        second = create_user(email="second@example.com", password="testpass123")
+        for user in (first, second):
+            cache.set(response_cache.version_key("user", user.id), 1, None)
+
+        self.client.force_authenticate(user=first)
+        self.client.get(reverse("user:manage"))
+        self.client.force_authenticate(user=second)
+        res = self.client.get(reverse("user:manage"))
+
+        self.assertEqual(res.data["email"], second.email)
+
+    def test_profile_not_modified(self):
+        """Test a matching If-None-Match on the profile returns 304"""
+        user = create_user(email="testuser@example.com", password="testpass123")
+        self.client.force_authenticate(user=user)
+        etag = self.client.get(reverse("user:manage"))["ETag"]
+
+        res = self.client.get(reverse("user:manage"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_update_user_profile(self):
         """Test updating the user profile"""
         user = create_user(email="testuser@example.com", password="testpass123")
@@ -115,4 +154,68 @@ class UserSerializerTests(TestCase):
         res = self.client.get(reverse("user:user-search"), {"search": "bio"})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_search_users_case_insensitive_literal(self):
+        """Test search ignores case and treats wildcards literally"""
+        create_user(email="user1@example.com", password="testpass123", bio="Big BIO")
+        create_user(email="user2@example.com", password="testpass123", bio="100%")
+        self.client.force_authenticate(
+            user=create_user(email="user3@example.com", password="testpass123")
+        )
+
+        res = self.client.get(reverse("user:user-search"), {"search": "big bio"})
+        self.assertEqual(len(res.data["results"]), 1)
+
+        res = self.client.get(reverse("user:user-search"), {"search": "0%"})
+        self.assertEqual(
+            [user["bio"] for user in res.data["results"]], ["100%"]
+        )
+
+    def test_search_users_skips_follow_graph(self):
+        """Test search results use the light projection"""
+        create_user(email="match@example.com", password="testpass123")
+        self.client.force_authenticate(
+            user=create_user(email="other@test.com", password="testpass123")
+        )
+
+        res = self.client.get(reverse("user:user-search"), {"search": "match"})
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(
+            set(res.data["results"][0]), {"id", "email", "bio", "avatar"}
+        )
+
+    def test_list_following_paginated(self):
+        """Test following list is paginated by follow order"""
+        user = create_user(email="user1@example.com", password="testpass123")
+        targets = [
+            create_user(email=f"target{i}@example.com", password="testpass123")
+            for i in range(3)
+        ]
+        for target in targets:
+            user.following.add(target)
+        self.client.force_authenticate(user=user)
+
+        res = self.client.get(reverse("user:list-following"), {"page_size": 2})
+        self.assertEqual(
+            [item["email"] for item in res.data["results"]],
+            [targets[2].email, targets[1].email],
+        )
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [item["email"] for item in res.data["results"]], [targets[0].email]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_profile_sparse_fields(self):
+        """Test ?fields= skips the followers list"""
+        user = create_user(email="testuser@example.com", password="testpass123")
+        self.client.force_authenticate(user=user)
+
+        res = self.client.get(
+            reverse("user:manage"), {"fields": "email,followers_count"}
+        )
+
+        self.assertEqual(set(res.data), {"email", "followers_count"})
@@ -11,6 +11,8 @@ from user.views import (
     LogoutView,
     UserSearchView,
     FollowUnfollowView,
+    BulkFollowView,
+    FollowSuggestionsView,
     ListFollowingView,
     ListFollowersView,
 )
@@ -26,6 +28,7 @@ urlpatterns = [
     path("logout/", LogoutView.as_view(), name="logout"),
     path("profile/<int:id>/", ManageUserView.as_view(), name="user-profile"),
     path("search/", UserSearchView.as_view(), name="user-search"),
+    path("follow/bulk/", BulkFollowView.as_view(), name="follow-bulk"),
     path("<int:pk>/follow/", FollowUnfollowView.as_view(), name="follow-user"),
     path(
         "<int:pk>/unfollow/",
@@ -34,4 +37,9 @@ urlpatterns = [
     ),
     path("me/following/", ListFollowingView.as_view(), name="list-following"),
     path("me/followers/", ListFollowersView.as_view(), name="list-followers"),
+    path(
+        "me/suggestions/",
+        FollowSuggestionsView.as_view(),
+        name="follow-suggestions"
+    ),
 ]
@@ -1,17 +1,44 @@
 from django.contrib.auth import get_user_model
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import generics, status, filters
+from rest_framework import generics, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from user.serializers import UserSerializer, ImageUploadSerializer
+from social_media_api.conditional import conditional_response
+from social_media_api.pagination import KeysetPagination
+from social_media_api.response_cache import cache_response
+from user import follows
+from user.blacklist import FilteredRefreshToken
+from user.authentication import CachedJWTAuthentication
+from user.search import search_users
+from user.models import FollowSuggestion
+from user.serializers import (
+    BulkFollowSerializer,
+    FollowSuggestionSerializer,
+    UserSerializer,
+    ImageUploadSerializer,
+    UserSummarySerializer,
+)
 
 User = get_user_model()
+Follow = User.followers.through
+
+
+def profile_validators(view, request, **kwargs):
+    # Follow changes update the counters and updated_at of both users
+    return User.objects.filter(pk=request.user.pk).values_list(
+        "updated_at", "followers_count", "following_count"
+    ).first()
+
+
+def summary_fields(relation):
+    """Columns of a follow edge needed to serialize one side of it"""
+    return ["id"] + [
+        f"{relation}__{field}" for field in UserSummarySerializer.Meta.fields
+    ]
 
 
 @extend_schema(
@@ -34,12 +61,20 @@ class CreateUserView(generics.CreateAPIView):
 class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
     lookup_field = "id"
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the auth cache; profiles need the row
+        return User.objects.get(pk=self.request.user.pk)
+
+    @conditional_response(profile_validators)
+    @cache_response(
+        "profile", lambda view, request, **kwargs: [("user", request.user.id)]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @extend_schema(
         summary="Delete own profile",
@@ -111,14 +146,66 @@ class FollowUnfollowView(APIView):
         )
 
 
+@extend_schema(
+    summary="Follow or unfollow many users",
+    description="Resolves all ids in one query and reports which users "
+    "were followed/unfollowed, already in that state, or missing.",
+    request=BulkFollowSerializer,
+)
+class BulkFollowView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data["user_ids"]
+        if serializer.validated_data["action"] == "follow":
+            result = follows.follow_many(request.user, user_ids)
+        else:
+            result = follows.unfollow_many(request.user, user_ids)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Who to follow",
+    description="Accounts followed by the people you follow, ranked by "
+    "overlap and popularity. Recomputed nightly.",
+)
+class FollowSuggestionsView(generics.ListAPIView):
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        # Only drops accounts followed since the nightly run, no two-hop join
+        return (
+            FollowSuggestion.objects.filter(user=user)
+            .exclude(
+                suggested__in=Follow.objects.filter(to_user=user).values(
+                    "from_user"
+                )
+            )
+            .select_related("suggested")
+            .order_by("-score", "-id")
+        )
+
+
 class ListFollowingView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        following_users = user.following.all()
-        serializer = UserSerializer(following_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        edges = (
+            Follow.objects.filter(to_user=user)
+            .select_related("from_user")
+            .only(*summary_fields("from_user"))
+            .order_by("-id")
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(edges, request, view=self)
+        following_users = [edge.from_user for edge in page]
+        serializer = UserSummarySerializer(following_users, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class ListFollowersView(APIView):
@@ -126,9 +213,17 @@ class ListFollowersView(APIView):
 
     def get(self, request):
         user = request.user
-        followers_users = user.followers.all()
-        serializer = UserSerializer(followers_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        edges = (
+            Follow.objects.filter(from_user=user)
+            .select_related("to_user")
+            .only(*summary_fields("to_user"))
+            .order_by("-id")
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(edges, request, view=self)
+        followers_users = [edge.to_user for edge in page]
+        serializer = UserSummarySerializer(followers_users, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class LoginUserView(APIView):
@@ -145,7 +240,7 @@ class LogoutView(APIView):
                     {"error": "Refresh token is required"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             # terminate token in case you are using blacklist
             return Response(
@@ -168,15 +263,23 @@ class LogoutView(APIView):
         ),
     ],
     responses={
-        200: UserSerializer(many=True),
+        200: UserSummarySerializer(many=True),
         400: {"description": "Bad Request"},
     },
     summary="Search Users",
     description="Search for users by email or bio "
-    "using a query parameter `search`.",
+    "using a query parameter `search`, most similar first.",
 )
 class UserSearchView(generics.ListAPIView):
-    queryset = User.objects.prefetch_related("followers", "following").all()
-    serializer_class = UserSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["email", "bio"]
+    queryset = User.objects.only("id", "email", "bio", "avatar").order_by(
+        "-id"
+    )
+    serializer_class = UserSummarySerializer
+    throttle_scope = "search"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query = self.request.query_params.get("search")
+        if query:
+            queryset = search_users(queryset, query)
+        return queryset